@@ -1,4 +1,6 @@
 from scopeserver.dataserver.modules.gserver import GServer as gs
+from scopeserver.dataserver.modules.gserver import AsyncGServer as ags
+from scopeserver.dataserver.modules.gserver import GServerSupervisor as gss
 from scopeserver.dataserver.modules.pserver import PServer as ps
 from scopeserver.bindserver import XServer as xs
 from scopeserver.utils import SysUtils as su
@@ -17,6 +19,8 @@ parser.add_argument('-p_port', metavar='pPort', type=int, help='pPort', default=
 parser.add_argument('-x_port', metavar='xPort', type=int, help='xPort', default=55852)
 parser.add_argument('--app_mode', action='store_true', help='Run in app mode (Fixed UUID)', default=False)
 parser.add_argument('--dev_env', action='store_true', help='Run in dev mode', default=False)
+parser.add_argument('--async_mode', action='store_true', help='Run the data server on asyncio (grpc.aio)', default=False)
+parser.add_argument('--workers', metavar='workers', type=int, help='Number of data server worker processes sharing the gPort (supervisor mode)', default=1)
 
 args = parser.parse_args()
 
@@ -31,13 +35,22 @@ class SCopeServer():
         self.x_port = args.x_port
         self.app_mode = args.app_mode
         self.dev_env = args.dev_env
+        self.async_mode = args.async_mode
+        self.workers = args.workers
 
     def start_bind_server(self):
         self.xs_thread = threading.Thread(target=xs.run, args=(self.run_event,), kwargs={'port': self.x_port})
         self.xs_thread.start()
 
     def start_data_server(self):
-        self.gs_thread = threading.Thread(target=gs.serve, args=(self.run_event, self.dev_env,), kwargs={'port': self.g_port, 'app_mode': self.app_mode})
+        serve = ags.serve if self.async_mode else gs.serve
+        if self.workers > 1:
+            # Started before any other thread (the restarted workers are forked by a single-threaded fork server)
+            supervisor = gss.GServerSupervisor(serve=serve, n_workers=self.workers, port=self.g_port, dev_env=self.dev_env, app_mode=self.app_mode)
+            supervisor.start()
+            self.gs_thread = threading.Thread(target=supervisor.run, args=(self.run_event,))
+        else:
+            self.gs_thread = threading.Thread(target=serve, args=(self.run_event, self.dev_env,), kwargs={'port': self.g_port, 'app_mode': self.app_mode})
         self.ps_thread = threading.Thread(target=ps.run, args=(self.run_event,), kwargs={'port': self.p_port})
         self.gs_thread.start()
         self.ps_thread.start()
@@ -0,0 +1,159 @@
+from concurrent import futures
+import asyncio
+import grpc
+
+from scopeserver.dataserver.modules.gserver import s_pb2
+from scopeserver.dataserver.modules.gserver import s_pb2_grpc
+from scopeserver.dataserver.modules.gserver import GServer as gs
+from scopeserver.utils import SysUtils as su
+from scopeserver.utils import Constant
+
+from google.protobuf import descriptor_pb2
+
+try:
+    from grpc import aio
+except ImportError:
+    # grpcio < 1.32
+    aio = None
+
+# Fast, in memory and read-only: run on the event loop. The RPCs writing to the session store (SQLite, waiting on its
+# lock in supervisor mode) or to the disk run in the I/O executor
+_LIGHTWEIGHT_RPCS = {'getLoomPreparationStatus'}
+# Long running: run in their own executor so that they cannot starve the interactive RPCs
+_COMPUTE_RPCS = {'doGeneSetEnrichment', 'doGeneSetsEnrichment', 'downloadSubLoom'}
+
+_END = object()
+
+
+class AsyncContext():
+
+    '''
+    Synchronous view of a grpc.aio servicer context, given to the SCope handlers run in the executor threads.
+    '''
+
+    def __init__(self, context):
+        self.context = context
+
+    def is_active(self):
+        return not self.context.done()
+
+    def __getattr__(self, name):
+        return getattr(self.context, name)
+
+
+class RequestIterator():
+
+    '''
+    Synchronous iterator over the requests of a grpc.aio client stream, read from an executor thread.
+    '''
+
+    def __init__(self, request_iterator, loop):
+        self.request_iterator = request_iterator.__aiter__()
+        self.loop = loop
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return asyncio.run_coroutine_threadsafe(self.request_iterator.__anext__(), self.loop).result()
+        except StopAsyncIteration:
+            raise StopIteration
+
+
+class AsyncSCope(s_pb2_grpc.MainServicer):
+
+    '''
+    AsyncSCope class serves the SCope RPCs on a grpc.aio server. The lightweight RPCs run on the event loop; the
+    blocking ones (HDF5 reads, computations) are offloaded to bounded executors: waiting clients do not hold a thread,
+    the concurrency is limited by the size of the executors (i.e.: the I/O capacity), not by the number of RPCs.
+    '''
+
+    def __init__(self):
+        self.scope = gs.SCope()
+        self.io_executor = futures.ThreadPoolExecutor(max_workers=Constant._ASYNC_IO_MAX_WORKERS)
+        self.compute_executor = futures.ThreadPoolExecutor(max_workers=Constant._ASYNC_COMPUTE_MAX_WORKERS)
+        service = descriptor_pb2.ServiceDescriptorProto()
+        s_pb2.DESCRIPTOR.services_by_name['Main'].CopyToProto(service)
+        for method in service.method:
+            setattr(self, method.name, self.get_handler(name=method.name,
+                                                        client_streaming=method.client_streaming,
+                                                        server_streaming=method.server_streaming))
+
+    def get_executor(self, name):
+        return self.compute_executor if name in _COMPUTE_RPCS else self.io_executor
+
+    def get_handler(self, name, client_streaming, server_streaming):
+        handler = getattr(self.scope, name)
+        executor = self.get_executor(name=name)
+
+        def get_request(request):
+            if client_streaming:
+                return RequestIterator(request_iterator=request, loop=asyncio.get_event_loop())
+            return request
+
+        if server_streaming:
+            async def stream(request, context):
+                loop = asyncio.get_event_loop()
+                replies = handler(get_request(request), AsyncContext(context))
+                pending = None
+                try:
+                    while True:
+                        pending = loop.run_in_executor(executor, next, replies, _END)
+                        reply = await pending
+                        if reply is _END:
+                            break
+                        yield reply
+                finally:
+                    # Stop the handler (e.g.: cancelled call) once its current step is done
+                    if pending is not None and not pending.done():
+                        pending.add_done_callback(lambda _: executor.submit(replies.close))
+                    else:
+                        replies.close()
+            return stream
+
+        if name in _LIGHTWEIGHT_RPCS:
+            async def call(request, context):
+                return handler(request, AsyncContext(context))
+            return call
+
+        async def call(request, context):
+            return await asyncio.get_event_loop().run_in_executor(executor, handler, get_request(request), AsyncContext(context))
+        return call
+
+    def shutdown(self):
+        self.io_executor.shutdown(wait=False)
+        self.compute_executor.shutdown(wait=False)
+        self.scope.shutdown()
+
+
+async def serve_async(run_event, port, worker_id):
+    server = aio.server(options=gs.get_server_options(worker_id=worker_id))
+    scope = AsyncSCope()
+    s_pb2_grpc.add_MainServicer_to_server(scope, server)
+    server.add_insecure_port('[::]:{0}'.format(port))
+    await server.start()
+    # Let the main process know that GServer has started.
+    if worker_id is None or worker_id == 0:
+        su.send_msg("GServer", "SIGSTART")
+
+    while run_event.is_set():
+        await asyncio.sleep(0.1)
+
+    await server.stop(0)
+    scope.shutdown()
+
+
+def serve(run_event, dev_env=False, port=50052, app_mode=False, worker_id=None):
+    if aio is None:
+        raise RuntimeError("The asyncio mode requires grpcio >= 1.32 (grpc.aio), found {0}.".format(grpc.__version__))
+    gs.SCope.dev_env = dev_env
+    gs.SCope.app_mode = app_mode
+    gs.SCope.worker_id = worker_id
+    # Run in its own thread: new event loop
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(serve_async(run_event=run_event, port=port, worker_id=worker_id))
+    finally:
+        loop.close()
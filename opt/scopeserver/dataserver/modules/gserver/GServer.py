@@ -17,6 +17,8 @@ import threading
 import pickle
 import uuid
 from collections import OrderedDict, defaultdict
+from contextlib import closing
+import functools
 from functools import lru_cache
 from itertools import compress
 from pathlib import Path
@@ -30,23 +32,92 @@ from scopeserver.utils import GeneSetEnrichment as _gse
 from scopeserver.utils import CellColorByFeatures as ccbf
 from scopeserver.utils import Constant
 from scopeserver.utils import SearchSpace as ss
+from scopeserver.utils import SubLoomWriter as slw
+from scopeserver.utils import SubLoomCache as slc
+from scopeserver.utils import EnrichmentCache as ec
+from scopeserver.utils import ComputeBackend as cb
+from scopeserver.utils import LoomPreparation as lpr
+from scopeserver.utils import FeatureStatistics as fs
+from scopeserver.utils import QuantileSketch as qs
 from scopeserver.utils.Loom import Loom
 
 from pyscenic.genesig import GeneSignature
-from pyscenic.aucell import create_rankings, enrichment, enrichment4cells
 
 hexarr = np.vectorize('{:02x}'.format)
 
 uploadedLooms = defaultdict(lambda: set())
 
+
+class LatestRequest():
+
+    '''
+    Keep only the most recent request received on a client stream. Requests that are superseded before being
+    processed are dropped, the one being processed can check is_stale() to abort early.
+    '''
+
+    def __init__(self, request_iterator):
+        self.request = None
+        self.generation = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        self.reader = threading.Thread(target=self.read, args=(request_iterator,), daemon=True)
+        self.reader.start()
+
+    def read(self, request_iterator):
+        try:
+            for request in request_iterator:
+                with self.condition:
+                    self.request = request
+                    self.generation += 1
+                    self.condition.notify()
+        except grpc.RpcError:
+            pass
+        finally:
+            with self.condition:
+                self.closed = True
+                self.condition.notify()
+
+    def next(self, generation, timeout):
+        # Block until a request newer than the given generation is available, None if the stream is closed or idle
+        # for timeout seconds (the stream ends: an idle search box does not hold a server thread)
+        deadline = time.time() + timeout
+        with self.condition:
+            while self.generation == generation and not self.closed:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self.condition.wait(timeout=remaining)
+            if self.generation == generation:
+                return None, generation
+            return self.request, self.generation
+
+    def is_stale(self, generation):
+        return self.generation != generation
+
+
 class SCope(s_pb2_grpc.MainServicer):
 
     app_name = 'SCope'
     app_author = 'Aertslab'
+    # Index of the worker in supervisor mode (None: single server process)
+    worker_id = None
 
     def __init__(self):
-        self.dfh = dfh.DataFileHandler(dev_env=SCope.dev_env)
-        self.lfh = lfh.LoomFileHandler()
+        self.dfh = dfh.DataFileHandler(dev_env=SCope.dev_env, worker_id=SCope.worker_id)
+        self.lfh = lfh.LoomFileHandler(read_only=SCope.worker_id is not None)
+        # HDF5 calls are serialized by h5py but the transforms, percentiles and statistics lookups run concurrently.
+        # Not a process pool: the looms are kept open (r+) by this process.
+        self.vmax_executor = futures.ThreadPoolExecutor(max_workers=Constant._VMAX_MAX_WORKERS)
+        self.sub_loom_cache = slc.SubLoomCache(dir_path=os.path.join(self.dfh.get_data_dirs()['Loom']['path'], "tmp"), max_size=Constant._SUB_LOOM_CACHE_SIZE)
+        # CPU-heavy work (AUCell) runs in worker processes: the threads serving the RPCs stay responsive
+        self.compute_backend = cb.ComputeBackend(n_processes=Constant._COMPUTE_BACKEND_PROCESSES)
+        self.enrichment_cache = ec.EnrichmentCache(dir_path=os.path.join(self.dfh.get_data_dirs()['LoomAUCellRankings']['path'], "enrichments"),
+                                                   max_memory_size=Constant._ENRICHMENT_CACHE_MEMORY_SIZE,
+                                                   max_disk_size=Constant._ENRICHMENT_CACHE_DISK_SIZE)
+        # Uploaded looms are prepared one at a time in the background
+        self.preparation_executor = futures.ThreadPoolExecutor(max_workers=Constant._LOOM_PREPARATION_MAX_WORKERS)
+        self.loom_preparations = {}
+        self.loom_preparations_lock = threading.Lock()
 
         self.dfh.load_gene_mappings()
         self.dfh.set_global_data()
@@ -57,71 +128,43 @@ class SCope(s_pb2_grpc.MainServicer):
         self.dfh.set_global_data()
         self.lfh.set_global_data()
 
-    @lru_cache(maxsize=256)
-    def get_features(self, loom, query):
-        print(query)
+    @lru_cache(maxsize=32)
+    def get_search_space(self, loom, cross_species):
         start_time = time.time()
+        search_space = ss.SearchSpace(loom=loom, cross_species=cross_species).build()
+        print("Debug: %s seconds elapsed making search space ---" % (time.time() - start_time))
+        return search_space
+
+    @staticmethod
+    def split_query(query):
         if query.startswith('hsap\\'):
-            search_space = ss.SearchSpace(loom=loom, cross_species='hsap').build()
-            cross_species = 'hsap'
-            query = query[5:]
+            return 'hsap', query[5:]
         elif query.startswith('mmus\\'):
-            search_space = ss.SearchSpace(loom=loom, cross_species='mmus').build()
-            cross_species = 'mmus'
-            query = query[5:]
-        else:
-            search_space = ss.SearchSpace(loom=loom).build()
-            cross_species = ''
-        print("Debug: %s seconds elapsed making search space ---" % (time.time() - start_time))    
-        print(query)
-
-        # Filter the genes by the query
-
-        # Allow caps innsensitive searching, minor slowdown
-        start_time = time.time()
-        res = []
-
-        queryCF = query.casefold()
-        res = [x for x in search_space.keys() if queryCF in x[0]]
-
-        for n, r in enumerate(res):
-            if query in r[0]:
-                r = res.pop(n)
-                res = [r] + res
-        for n, r in enumerate(res):
-            if r[0].startswith(queryCF):
-                r = res.pop(n)
-                res = [r] + res
-        for n, r in enumerate(res):
-            if r[0] == queryCF:
-                r = res.pop(n)
-                res = [r] + res
-        for n, r in enumerate(res):
-            if r[1] == query:
-                r = res.pop(n)
-                res = [r] + res
+            return 'mmus', query[5:]
+        return '', query
 
+    def collapse_features(self, loom, res, search_space, cross_species, seen):
         # These structures are a bit messy, but still fast
         # r = (elementCF, element, elementName)
-        # dg = (drosElement, %match)
-        # searchSpace[r] = translastedElement
+        # dg = (drosElement, %match, description)
+        # searchSpace[r] = translastedElement (or orthologues when searching cross species)
         collapsedResults = OrderedDict()
         if cross_species == '':
             for r in res:
+                if (search_space[r], r[2]) in seen:
+                    continue
                 if (search_space[r], r[2]) not in collapsedResults.keys():
                     collapsedResults[(search_space[r], r[2])] = [r[1]]
                 else:
                     collapsedResults[(search_space[r], r[2])].append(r[1])
-        elif cross_species == 'hsap':
-            for r in res:
-                for dg in self.dfh.hsap_to_dmel_mappings[search_space[r]]:
-                    if (dg[0], r[2]) not in collapsedResults.keys():
-                        collapsedResults[(dg[0], r[2])] = (r[1], dg[1])
-        elif cross_species == 'mmus':
+        else:
+            # The orthologue index is shared by all the looms, only keep the genes present in this one
+            genes = loom.get_gene_set()
             for r in res:
-                for dg in self.dfh.mmus_to_dmel_mappings[search_space[r]]:
-                    if (dg[0], r[2]) not in collapsedResults.keys():
-                        collapsedResults[(dg[0], r[2])] = (r[1], dg[1])
+                for dg in search_space[r]:
+                    if dg[0] in genes and (dg[0], r[2]) not in collapsedResults.keys() and (dg[0], r[2]) not in seen:
+                        collapsedResults[(dg[0], r[2])] = dg[2]
+        seen.update(collapsedResults.keys())
 
         descriptions = []
         if cross_species == '':
@@ -135,19 +178,64 @@ class SCope(s_pb2_grpc.MainServicer):
                     descriptions.append('Synonym of: {0}'.format(', '.join(synonyms)))
                 else:
                     descriptions.append('')
-        elif cross_species == 'hsap':
-            for r in collapsedResults.keys():
-                descriptions.append('Orthologue of {0}, {1:.2f}% identity (Human -> Drosophila)'.format(collapsedResults[r][0], collapsedResults[r][1]))
-        elif cross_species == 'mmus':
-            for r in collapsedResults.keys():
-                descriptions.append('Orthologue of {0}, {1:.2f}% identity (Mouse -> Drosophila)'.format(collapsedResults[r][0], collapsedResults[r][1]))
+        else:
+            descriptions = list(collapsedResults.values())
         # if mapping[result] != result: change title and description to indicate synonym
 
-        print("Debug: " + str(len(res)) + " genes matching '" + query + "'")
+        return {'feature': [r[0] for r in collapsedResults.keys()],
+                'featureType': [r[1] for r in collapsedResults.keys()],
+                'featureDescription': descriptions}
+
+    def search_features(self, loom, query, is_cancelled=None):
+        """Search the features of the given loom matching the given query.
+
+        Args:
+            is_cancelled (function): Checked while searching, the search stops (nothing more is yielded) once it
+                returns True (e.g.: superseded query).
+
+        Yields:
+            dict: Results grouped by relevance: exact matches first, then prefix matches and finally all the other
+            substring matches. Each feature is only returned once.
+
+        """
+        cross_species, query = SCope.split_query(query=query)
+        search_space = self.get_search_space(loom=loom, cross_species=cross_species)
+        if cross_species != '':
+            search_space = search_space.get_orthologue_index()
+        print(query)
+
+        # Allow caps innsensitive searching, minor slowdown
+        start_time = time.time()
+        queryCF = query.casefold()
+        exact, prefix, substring = [], [], []
+        for n, x in enumerate(search_space.keys()):
+            if is_cancelled is not None and n % Constant._SEARCH_CANCEL_CHECK_INTERVAL == 0 and is_cancelled():
+                return
+            if queryCF not in x[0]:
+                continue
+            if x[1] == query or x[0] == queryCF:
+                exact.append(x)
+            elif x[0].startswith(queryCF):
+                prefix.append(x)
+            else:
+                substring.append(x)
+        # Exact element matches before case insensitive ones
+        exact.sort(key=lambda x: x[1] != query)
+        print("Debug: " + str(len(exact) + len(prefix) + len(substring)) + " genes matching '" + query + "'")
         print("Debug: %s seconds elapsed ---" % (time.time() - start_time))
-        res = {'feature': [r[0] for r in collapsedResults.keys()],
-               'featureType': [r[1] for r in collapsedResults.keys()],
-               'featureDescription': descriptions}
+
+        seen = set()
+        for res in [exact, prefix, substring]:
+            if is_cancelled is not None and is_cancelled():
+                return
+            yield self.collapse_features(loom=loom, res=res, search_space=search_space, cross_species=cross_species, seen=seen)
+
+    @lru_cache(maxsize=256)
+    def get_features(self, loom, query):
+        res = {'feature': [], 'featureType': [], 'featureDescription': []}
+        for f in self.search_features(loom=loom, query=query):
+            for k in res.keys():
+                res[k].extend(f[k])
         return res
 
     def compressHexColor(self, a):
@@ -165,39 +253,76 @@ class SCope(s_pb2_grpc.MainServicer):
             vmax = 0.01
         return vmax, maxVmax
 
+    @staticmethod
+    def get_loom_vmax(loom, feature_type, feature, log_transform, cpm_normalise):
+        statistics = loom.get_statistics()
+        vmax = statistics.get_vmax(feature_type=feature_type, feature=feature, log_transform=log_transform, cpm_normalise=cpm_normalise)
+        if vmax is not None:
+            return vmax
+        # Not precomputed (yet): compute the statistics sidecar in the background
+        statistics.compute_async()
+        if feature_type == 'gene':
+            vals, cell_indices = loom.get_gene_expression(
+                gene_symbol=feature,
+                log_transform=log_transform,
+                cpm_normalise=cpm_normalise)
+            return SCope.get_vmax(vals)
+        if feature_type == 'regulon':
+            vals, cell_indices = loom.get_auc_values(regulon=feature)
+            return SCope.get_vmax(vals)
+        if feature_type == 'metric':
+            vals, cell_indices = loom.get_metric(
+                metric_name=feature,
+                log_transform=log_transform,
+                cpm_normalise=cpm_normalise)
+            return SCope.get_vmax(vals)
+        return 0, 0
+
+    @staticmethod
+    def get_loom_sketch(loom, feature_type, feature, cpm_normalise):
+        return loom.get_statistics().get_loom_sketch(feature_type=feature_type, feature=feature, cpm_normalise=cpm_normalise)
+
+    @staticmethod
+    def get_looms_vmax(sketches, feature_type, log_transform):
+        # vmax over the cells of all the looms (the max of the vmax of each loom overestimates the 99th percentile)
+        sketch = qs.QuantileSketch.merge(sketches)
+        return fs.FeatureStatistics.get_vmax_from_sketch(sketch=sketch, feature_type=feature_type, log_transform=log_transform)
+
     def getVmax(self, request, context):
         v_max = np.zeros(3)
         max_v_max = np.zeros(3)
 
-        for n, feature in enumerate(request.feature):
-            f_v_max = 0
-            f_max_v_max = 0
-            if feature != '':
-                for loomFilePath in request.loomFilePath:
-                    l_v_max = 0
-                    l_max_v_max = 0
-                    loom = self.lfh.get_loom(loom_file_path=loomFilePath)
-                    if request.featureType[n] == 'gene':
-                        vals, cell_indices = loom.get_gene_expression(
-                            gene_symbol=feature,
-                            log_transform=request.hasLogTransform,
-                            cpm_normalise=request.hasCpmTransform)
-                        l_v_max, l_max_v_max = SCope.get_vmax(vals)
-                    if request.featureType[n] == 'regulon':
-                        vals, cell_indices = loom.get_auc_values(regulon=feature)
-                        l_v_max, l_max_v_max = SCope.get_vmax(vals)
-                    if request.featureType[n] == 'metric':
-                        vals, cell_indices = loom.get_metric(
-                            metric_name=feature,
-                            log_transform=request.hasLogTransform,
-                            cpm_normalise=request.hasCpmTransform)
-                        l_v_max, l_max_v_max = SCope.get_vmax(vals)
-                    if l_v_max > f_v_max:
-                        f_v_max = l_v_max
-                if l_max_v_max > f_max_v_max:
-                    f_max_v_max = l_max_v_max
-            v_max[n] = f_v_max
-            max_v_max[n] = f_max_v_max
+        # Fan-out over the looms: the compare view syncs the vmax of several datasets at once
+        looms = list(self.vmax_executor.map(lambda loomFilePath: self.lfh.get_loom(loom_file_path=loomFilePath), request.loomFilePath))
+        features = [(n, feature) for n, feature in enumerate(request.feature) if feature != '']
+        # Several looms: merge the quantile sketches of their cells when available
+        sketches = {}
+        if len(looms) > 1:
+            for n, feature in features:
+                sketches[n] = [self.vmax_executor.submit(SCope.get_loom_sketch,
+                                                         loom=loom,
+                                                         feature_type=request.featureType[n],
+                                                         feature=feature,
+                                                         cpm_normalise=request.hasCpmTransform)
+                               for loom in looms]
+            sketches = {n: [job.result() for job in jobs] for n, jobs in sketches.items()}
+        jobs = defaultdict(list)
+        for n, feature in features:
+            if n in sketches and all(sketch is not None for sketch in sketches[n]):
+                v_max[n], max_v_max[n] = SCope.get_looms_vmax(sketches=sketches[n], feature_type=request.featureType[n], log_transform=request.hasLogTransform)
+                continue
+            for loom in looms:
+                jobs[n].append(self.vmax_executor.submit(SCope.get_loom_vmax,
+                                                         loom=loom,
+                                                         feature_type=request.featureType[n],
+                                                         feature=feature,
+                                                         log_transform=request.hasLogTransform,
+                                                         cpm_normalise=request.hasCpmTransform))
+        for n, feature_jobs in jobs.items():
+            for job in feature_jobs:
+                l_v_max, l_max_v_max = job.result()
+                v_max[n] = max(v_max[n], l_v_max)
+                max_v_max[n] = max(max_v_max[n], l_max_v_max)
         return s_pb2.VmaxReply(vmax=v_max, maxVmax=max_v_max)
 
     def getCellColorByFeatures(self, request, context):
@@ -276,6 +401,31 @@ class SCope(s_pb2_grpc.MainServicer):
         f = self.get_features(loom=loom, query=request.query)
         return s_pb2.FeatureReply(feature=f['feature'], featureType=f['featureType'], featureDescription=f['featureDescription'])
 
+    def getFeaturesStream(self, request_iterator, context):
+        # Search-as-you-type: a query is dropped as soon as a newer one arrives on the same stream. The stream ends
+        # once idle (the client opens a new one on the next keystroke)
+        latest_request = LatestRequest(request_iterator=request_iterator)
+        generation = 0
+        while context.is_active():
+            request, generation = latest_request.next(generation=generation, timeout=Constant._FEATURES_STREAM_IDLE_TIMEOUT)
+            if request is None:
+                break
+            try:
+                loom = self.lfh.get_loom(loom_file_path=request.loomFilePath)
+            except ValueError:
+                continue
+            is_stale = functools.partial(latest_request.is_stale, generation=generation)
+            for f in self.search_features(loom=loom, query=request.query, is_cancelled=is_stale):
+                if is_stale():
+                    break
+                if len(f['feature']) == 0:
+                    continue
+                yield s_pb2.FeatureReply(feature=f['feature'], featureType=f['featureType'], featureDescription=f['featureDescription'], query=request.query, isDone=False)
+            if is_stale():
+                print("Debug: query '{0}' superseded".format(request.query))
+            else:
+                yield s_pb2.FeatureReply(query=request.query, isDone=True)
+
     def getCoordinates(self, request, context):
         # request content
         loom = self.lfh.get_loom(loom_file_path=request.loomFilePath)
@@ -340,7 +490,7 @@ class SCope(s_pb2_grpc.MainServicer):
             for i in ['Loom', 'GeneSet', 'LoomAUCellRankings']:
                 os.mkdir(os.path.join(self.dfh.get_data_dirs()[i]['path'], request.UUID))
 
-        geneSetsToProcess = sorted(self.dfh.get_gobal_sets()) + sorted([os.path.join(request.UUID, x) for x in os.listdir(userDir)])
+        geneSetsToProcess = sorted(self.dfh.get_gobal_sets()) + sorted([os.path.join(request.UUID, x) for x in os.listdir(userDir) if not x.startswith('.')])
         gene_sets = [s_pb2.MyGeneSet(geneSetFilePath=f, geneSetDisplayName=os.path.splitext(os.path.basename(f))[0]) for f in geneSetsToProcess]
         return s_pb2.MyGeneSetsReply(myGeneSets=gene_sets)
 
@@ -400,47 +550,26 @@ class SCope(s_pb2_grpc.MainServicer):
             newUUID = str(uuid.uuid4())
         if newUUID not in self.dfh.get_current_UUIDs().keys():
             self.dfh.get_uuid_log().write("{0} :: {1} :: New UUID ({2}) assigned.\n".format(time.strftime('%Y-%m-%d__%H-%M-%S', time.localtime()), request.ip, newUUID))
-            self.dfh.get_uuid_log().flush()
-            self.dfh.get_current_UUIDs()[newUUID] = time.time()
+            self.dfh.add_UUID(UUID=newUUID)
         return s_pb2.UUIDReply(UUID=newUUID)
 
-    def getRemainingUUIDTime(self, request, context):  # TODO: his function will be called a lot more often, we should reduce what it does.
-        curUUIDSet = set(list(self.dfh.get_current_UUIDs().keys()))
-        for uid in curUUIDSet:
-            timeRemaining = int(dfh._UUID_TIMEOUT - (time.time() - self.dfh.get_current_UUIDs()[uid]))
-            if timeRemaining < 0:
-                print('Removing UUID: {0}'.format(uid))
-                del(self.dfh.get_current_UUIDs()[uid])
-                for i in ['Loom', 'GeneSet', 'LoomAUCellRankings']:
-                    if os.path.exists(os.path.join(self.dfh.get_data_dirs()[i]['path'], uid)):
-                        shutil.rmtree(os.path.join(self.dfh.get_data_dirs()[i]['path'], uid))
+    def getRemainingUUIDTime(self, request, context):
+        # Polled by every browser: the expired UUIDs are removed by the session reaper of the DataFileHandler
         uid = request.UUID
-        if uid in self.dfh.get_current_UUIDs():
-            startTime = self.dfh.get_current_UUIDs()[uid]
+        startTime = self.dfh.get_current_UUIDs().get(uid)
+        if startTime is not None:
             timeRemaining = int(dfh._UUID_TIMEOUT - (time.time() - startTime))
             self.dfh.get_uuid_log().write("{0} :: {1} :: Old UUID ({2}) connected :: Time Remaining - {3}.\n".format(time.strftime('%Y-%m-%d__%H-%M-%S', time.localtime()), request.ip, uid, timeRemaining))
-            self.dfh.get_uuid_log().flush()
         else:
             try:
                 uuid.UUID(uid)
             except (KeyError, AttributeError):
                 uid = str(uuid.uuid4())
             self.dfh.get_uuid_log().write("{0} :: {1} :: New UUID ({2}) assigned.\n".format(time.strftime('%Y-%m-%d__%H-%M-%S', time.localtime()), request.ip, uid))
-            self.dfh.get_uuid_log().flush()
-            self.dfh.get_current_UUIDs()[uid] = time.time()
+            self.dfh.add_UUID(UUID=uid)
             timeRemaining = int(dfh._UUID_TIMEOUT)
 
-        self.dfh.active_session_check()
-        if request.mouseEvents >= Constant._MOUSE_EVENTS_THRESHOLD:
-            self.dfh.reset_active_session_timeout(uid)
-
-        sessionsLimitReached = False
-
-        if len(self.dfh.get_active_sessions().keys()) >= Constant._ACTIVE_SESSIONS_LIMIT and uid not in self.dfh.get_permanent_UUIDs() and uid not in self.dfh.get_active_sessions().keys():
-            sessionsLimitReached = True
-
-        if uid not in self.dfh.get_active_sessions().keys() and not sessionsLimitReached:
-            self.dfh.reset_active_session_timeout(uid)
+        sessionsLimitReached = not self.dfh.admit_session(UUID=uid, active=request.mouseEvents >= Constant._MOUSE_EVENTS_THRESHOLD)
         return s_pb2.RemainingUUIDTimeReply(UUID=uid, timeRemaining=timeRemaining, sessionsLimitReached=sessionsLimitReached)
 
     def translateLassoSelection(self, request, context):
@@ -469,12 +598,67 @@ class SCope(s_pb2_grpc.MainServicer):
 
         return s_pb2.DeleteUserFileReply(deletedSuccessfully=success)
     
+    @staticmethod
+    def get_sub_loom_cells(loom, request):
+        """Get the cells selected by the given DownloadSubLoomRequest.
+
+        Returns:
+            tuple: (cell indices, name describing the selection).
+
+        """
+        loom_connection = loom.get_connection()
+        if request.featureType == "clusterings":
+            a = list(filter(lambda x : x['name'] == request.featureName, loom.get_meta_data()["clusterings"]))
+            b = list(filter(lambda x : x['description'] == request.featureValue, a[0]['clusters']))[0]
+            cell_indices = np.where(loom_connection.ca["Clusterings"][str(a[0]['id'])] == b['id'])[0]
+            name = request.featureValue
+        elif request.featureType == "annotations":
+            if len(request.annotation) == 0:
+                raise ValueError("No annotation given.")
+            if any(len(anno.values) == 0 for anno in request.annotation):
+                raise ValueError("No value given for the annotation {0}.".format(next(anno.name for anno in request.annotation if len(anno.values) == 0)))
+            cell_indices = loom.get_anno_cells(annotations=request.annotation, logic=request.logic)
+            if len(cell_indices) == 0:
+                raise ValueError("No cells match the given annotations.")
+            name = "_{0}_".format(request.logic if request.logic == 'AND' else 'OR').join(["{0}_{1}".format(anno.name, "_".join(anno.values)) for anno in request.annotation])
+        elif request.featureType == "cellIndices":
+            cell_indices = np.unique(np.array(request.cellIndices, dtype=np.int64))
+            if len(cell_indices) > 0 and (cell_indices[0] < 0 or cell_indices[-1] >= loom.get_nb_cells()):
+                raise ValueError("The selected cells do not exist in the current active .loom.")
+            name = request.featureValue if request.featureValue != '' else "Selection"
+        elif request.featureType == "metric":
+            metric = loom.get_ca_attr_by_name(name=request.featureName)
+            cell_indices = np.where(np.logical_and(metric >= request.metricMin, metric <= request.metricMax))[0]
+            name = "{0}_{1:g}-{2:g}".format(request.featureName, request.metricMin, request.metricMax)
+        else:
+            raise ValueError("The feature type {0} is currently not implemented.".format(request.featureType))
+        return np.asarray(cell_indices, dtype=np.int64), name.replace(" ", "_").replace("/", "_")
+
+    @staticmethod
+    def read_sub_loom_chunks(file_path):
+        with open(file_path, 'rb') as fh:
+            offset = 0
+            while True:
+                chunk = fh.read(Constant._DOWNLOAD_CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield offset, chunk
+                offset += len(chunk)
+
+    @staticmethod
+    def get_sub_loom_data_replies(chunks, loom_file_size, progress):
+        for offset, data in chunks:
+            yield s_pb2.DownloadSubLoomReply(data=data
+                                           , offset=offset
+                                           , loomFileSize=loom_file_size
+                                           , progress=progress
+                                           , isDone=False)
+
     def downloadSubLoom(self, request, context):
         start_time = time.time()
 
         loom = self.lfh.get_loom(loom_file_path=request.loomFilePath)
         loom_connection = loom.get_connection()
-        meta_data = loom.get_meta_data()
 
         file_name = request.loomFilePath
         # Check if not a public loom file
@@ -482,16 +666,24 @@ class SCope(s_pb2_grpc.MainServicer):
             l = request.loomFilePath.split("/")
             file_name = l[1].split(".")[0]
 
-        if(request.featureType == "clusterings"):
-            a = list(filter(lambda x : x['name'] == request.featureName, meta_data["clusterings"]))
-            b = list(filter(lambda x : x['description'] == request.featureValue, a[0]['clusters']))[0]
-            cells = loom_connection.ca["Clusterings"][str(a[0]['id'])] == b['id']
-            print("Number of cells in {0}: {1}".format(request.featureValue, np.sum(cells)))
-            sub_loom_file_name = file_name +"_Sub_"+ request.featureValue.replace(" ", "_").replace("/","_")
-            sub_loom_file_path = os.path.join(self.dfh.get_data_dirs()['Loom']['path'], "tmp" , sub_loom_file_name +".loom")
-            # Check if the file already exists
-            if os.path.exists(path=sub_loom_file_path):
-                os.remove(path=sub_loom_file_path)
+        try:
+            cell_indices, name = SCope.get_sub_loom_cells(loom=loom, request=request)
+            if len(cell_indices) == 0:
+                raise ValueError("No cells are selected.")
+        except (ValueError, IndexError, KeyError) as e:
+            yield s_pb2.DownloadSubLoomReply(error=s_pb2.ErrorReply(type="Value Error", message=str(e)), isDone=True)
+            return
+        print("Number of cells in {0}: {1}".format(name, len(cell_indices)))
+        sub_loom_file_name = file_name + "_Sub_" + name
+        # Content-addressed: an identical selection is served from the cache
+        sub_loom_file_path = self.sub_loom_cache.get_file_path(name=sub_loom_file_name,
+                                                               key=slc.SubLoomCache.get_key(partial_md5_hash=loom.partial_md5_hash, name=sub_loom_file_name, cell_indices=cell_indices))
+        loom_file_size = self.sub_loom_cache.get(file_path=sub_loom_file_path)
+        # Streamed without cached copy unless requested: the sub loom is sent while it is written, in memory if small
+        # enough (no copy on disk) or to a temporary file removed once sent
+        keep_file = request.keepFile or not request.streamData
+        in_memory = not keep_file and slw.SubLoomWriter.fits_in_memory(n_genes=loom_connection.shape[0], n_cells=len(cell_indices))
+        if loom_file_size is None:
             # Create new file attributes
             sub_loom_file_attrs = dict()
             sub_loom_file_attrs["title"] = sub_loom_file_name
@@ -501,39 +693,54 @@ class SCope(s_pb2_grpc.MainServicer):
             sub_loom_file_attrs["MetaData"] = Loom.clean_file_attr(file_attr=loom_connection.attrs["MetaData"])
             # - Use scan to subset cells (much faster than naive subsetting): avoid to load everything into memory
             # - Loompy bug: loompy.create_append works but generate a file much bigger than its parent
-            #      So prepare all the data and create the loom afterwards
-            print("Subsetting {0} cluster from the active .loom...".format(request.featureValue))
-            sub_matrix = None
-            sub_selection = None
-            for (_, selection, _) in loom_connection.scan(items=cells, axis=1):
-                if sub_matrix is None:
-                    sub_matrix = loom_connection[:, selection]
-                    sub_selection = selection
-                else:
-                    sub_matrix = np.concatenate((sub_matrix, loom_connection[:, selection]), axis=1)
-                    sub_selection = np.concatenate((sub_selection, selection), axis=0)
-                # Send the progress
-                processed = len(sub_selection)/sum(cells)
-                yield s_pb2.DownloadSubLoomReply(loomFilePath=""
-                                               , loomFileSize=0
-                                               , progress=s_pb2.Progress(value=processed, status="Sub Loom Created!")
-                                               , isDone=False)
-            print("Creating {0} sub .loom...".format(request.featureValue))
-            lp.create(sub_loom_file_path, sub_matrix, row_attrs=loom_connection.ra, col_attrs=loom_connection.ca[sub_selection], file_attrs=sub_loom_file_attrs)
-            with open(sub_loom_file_path, 'r') as fh:
-                loom_file_size = os.fstat(fh.fileno())[6]
+            #      So preallocate the matrix and write each scanned batch into its column slice
+            print("Subsetting {0} from the active .loom...".format(name))
+            sub_loom_writer = slw.SubLoomWriter(file_path=sub_loom_file_path, n_genes=loom_connection.shape[0], n_cells=len(cell_indices), in_memory=in_memory)
+            sub_selection = []
+            # Batches of cells as wide as the memory budget allows: chunks spanning many cells (e.g.: optimized loom)
+            # are not read once per batch
+            batch_size = max(Constant._MATRIX_READ_BAND_SIZE // (max(loom_connection.shape[0], 1) * 4), 1000)
+            try:
+                for (_, selection, view) in loom_connection.scan(items=cell_indices, axis=1, batch_size=batch_size):
+                    sub_loom_writer.write(vals=view[:, :])
+                    sub_selection.append(selection)
+                    progress = s_pb2.Progress(value=sub_loom_writer.get_progress(), status="Sub Loom Created!")
+                    # Send the bytes written so far (the size of the sub loom is not known yet)
+                    if request.streamData:
+                        yield from SCope.get_sub_loom_data_replies(chunks=sub_loom_writer.get_chunks(), loom_file_size=0, progress=progress)
+                    # Send the progress
+                    yield s_pb2.DownloadSubLoomReply(loomFilePath=""
+                                                   , loomFileSize=0
+                                                   , progress=progress
+                                                   , isDone=False)
+                print("Creating {0} sub .loom...".format(name))
+                loom_file_size = sub_loom_writer.close(row_attrs=loom_connection.ra, col_attrs=loom_connection.ca[np.concatenate(sub_selection)], file_attrs=sub_loom_file_attrs)
+                # Remaining chunks and chunks updated on close
+                if request.streamData:
+                    yield from SCope.get_sub_loom_data_replies(chunks=sub_loom_writer.get_chunks(),
+                                                               loom_file_size=loom_file_size,
+                                                               progress=s_pb2.Progress(value=1.0, status="Sending Sub Loom..."))
+                if keep_file:
+                    sub_loom_writer.commit()
+            finally:
+                # Removes the temporary file unless committed (error, cancelled or not kept)
+                sub_loom_writer.abort()
+            if keep_file:
+                self.sub_loom_cache.enforce_budget(keep=sub_loom_file_path)
             print("Done!")
-            print("Debug: %s seconds elapsed ---" % (time.time() - start_time))
-        else:
-            print("This feature is currently not implemented.")
-        yield s_pb2.DownloadSubLoomReply(loomFilePath=sub_loom_file_path
+        elif request.streamData:
+            yield from SCope.get_sub_loom_data_replies(chunks=SCope.read_sub_loom_chunks(file_path=sub_loom_file_path),
+                                                       loom_file_size=loom_file_size,
+                                                       progress=s_pb2.Progress(value=1.0, status="Sending Sub Loom..."))
+        print("Debug: %s seconds elapsed ---" % (time.time() - start_time))
+        yield s_pb2.DownloadSubLoomReply(loomFilePath=sub_loom_file_path if keep_file else ""
                                        , loomFileSize=loom_file_size
                                        , progress=s_pb2.Progress(value=1.0, status="Sub Loom Created!")
                                        , isDone=True)
 
     # Gene set enrichment
     #
-    # Threaded makes it slower because of GIL
+    # Threaded makes it slower because of GIL: the rankings and the AUCs are computed by the compute backend
     #
     def doGeneSetEnrichment(self, request, context):
         gene_set_file_path = os.path.join(self.dfh.get_gene_sets_dir(), request.geneSetFilePath)
@@ -544,74 +751,179 @@ class SCope(s_pb2_grpc.MainServicer):
                                 gene_set_file_path=gene_set_file_path,
                                 annotation='')
 
-        # Running AUCell...
-        yield gse.update_state(step=-1, status_code=200, status_message="Running AUCell...", values=None)
-        time.sleep(1)
+        # Same loom, gene set and parameters: the enrichment is served from the cache
+        cache_key = gse.get_cache_key()
+        aucs = self.enrichment_cache.get(key=cache_key)
+        if aucs is not None:
+            yield gse.update_state(step=1.0, status_code=200, status_message=gse.get_method() + " enrichment done!", values=aucs)
+            return
 
         # Reading gene set...
         yield gse.update_state(step=0, status_code=200, status_message="Reading the gene set...", values=None)
-        with open(gse.gene_set_file_path, 'r') as f:
-            # Skip first line because it contains the name of the signature
-            gs = GeneSignature(name='Gene Signature #1',
-                               gene2weight=[line.strip() for idx, line in enumerate(f) if idx > 0])
-        time.sleep(1)
-
-        if not gse.has_AUCell_rankings():
-            # Creating the matrix as DataFrame...
-            yield gse.update_state(step=1, status_code=200, status_message="Creating the matrix...", values=None)
-            loom = self.lfh.get_loom(loom_file_path=request.loomFilePath)
-            dgem = np.transpose(loom.get_connection()[:, :])
-            ex_mtx = pd.DataFrame(data=dgem,
-                                  index=loom.get_ca_attr_by_name("CellID"),
-                                  columns=loom.get_genes())
-            # Creating the rankings...
-            start_time = time.time()
-            yield gse.update_state(step=2.1, status_code=200, status_message="Creating the rankings...", values=None)
-            rnk_mtx = create_rankings(ex_mtx=ex_mtx)
-            # Saving the rankings...
-            yield gse.update_state(step=2.2, status_code=200, status_message="Saving the rankings...", values=None)
-            lp.create(gse.get_AUCell_ranking_filepath(), rnk_mtx.as_matrix(), {"CellID": loom.get_cell_ids()}, {"Gene": loom.get_genes()})
-            print("Debug: %s seconds elapsed ---" % (time.time() - start_time))
-        else:
-            # Load the rankings...
-            yield gse.update_state(step=2, status_code=200, status_message="Rankings exists: loading...", values=None)
-            rnk_loom = self.lfh.get_loom_connection(gse.get_AUCell_ranking_filepath())
-            rnk_mtx = pd.DataFrame(data=rnk_loom[:, :],
-                                   index=rnk_loom.ra.CellID,
-                                   columns=rnk_loom.ca.Gene)
-
-        # Calculating AUCell enrichment...
+        gs = gse.get_gene_signature()
+
+        # Running AUCell (reads the rankings of the genes of the signature only)...
         start_time = time.time()
-        yield gse.update_state(step=3, status_code=200, status_message="Calculating AUCell enrichment...", values=None)
-        aucs = enrichment(rnk_mtx, gs).loc[:, "AUC"].values
+        aucs = None
+        for progress, status_message, aucs in self.run_AUCell(gse=gse, loom=loom, gene_signatures=[gs], context=context):
+            if aucs is None:
+                yield gse.update_state(step=progress, status_code=200, status_message=status_message, values=None)
+        print("Debug: %s seconds elapsed ---" % (time.time() - start_time))
+        if aucs is None:
+            return
+        self.enrichment_cache.set(key=cache_key, values=aucs[0])
+        yield gse.update_state(step=1.0, status_code=200, status_message=gse.get_method() + " enrichment done!", values=aucs[0])
+
+    @staticmethod
+    def is_cancelled(context):
+        # The client cancelled the call, disconnected or its deadline is exceeded
+        if context is None:
+            return False
+        if not context.is_active():
+            return True
+        time_remaining = context.time_remaining()
+        return time_remaining is not None and time_remaining <= 0
+
+    def run_AUCell(self, gse, loom, gene_signatures, context):
+        """Run AUCell on the given gene signatures as a pipeline of blocks of cells: the rankings are created (if
+        missing) then the gene signatures are scored, block by block. The call is checked between blocks: the pipeline
+        stops as soon as it is cancelled.
+
+        Yields:
+            tuple: The fraction of the work done, the status message and the AUCs (n_signatures x n_cells) once all
+                the cells are scored (None before). Progress is only reported when it changed by 1% at least.
+
+        """
+        rankings = gse.get_AUCell_rankings()
+        rankings_share = 0
+        reported = -1
+        if not rankings.exists():
+            # Creating the rankings per block of cells...
+            rankings_share = Constant._AUCELL_RANKINGS_PROGRESS_SHARE
+            with closing(rankings.build(loom=loom, compute_backend=self.compute_backend)) as blocks:
+                for processed in blocks:
+                    if SCope.is_cancelled(context=context):
+                        print("Debug: AUCell cancelled while creating the rankings")
+                        return
+                    if int(processed * 100) > reported:
+                        reported = int(processed * 100)
+                        yield processed * rankings_share, "Creating the rankings ({0:.0%})...".format(processed), None
+        # Calculating AUCell enrichment of the gene signatures per block of cells...
+        reported = -1
+        with closing(rankings.get_batch_aucs(genes=loom.get_genes(),
+                                             gene_signatures=gene_signatures,
+                                             compute_backend=self.compute_backend,
+                                             auc_threshold=Constant._AUCELL_AUC_THRESHOLD)) as blocks:
+            for processed, aucs in blocks:
+                if SCope.is_cancelled(context=context):
+                    print("Debug: AUCell cancelled while calculating the enrichment")
+                    return
+                if aucs is not None or int(processed * 100) > reported:
+                    reported = int(processed * 100)
+                    yield rankings_share + (1 - rankings_share) * processed, "Calculating AUCell enrichment ({0:.0%})...".format(processed), aucs
+
+    # Enrichment of several gene sets in a single pass over the rankings
+    def doGeneSetsEnrichment(self, request, context):
+        loom = self.lfh.get_loom(loom_file_path=request.loomFilePath)
+        gses = [_gse.GeneSetEnrichment(scope=self,
+                                       method="AUCell",
+                                       loom=loom,
+                                       gene_set_file_path=os.path.join(self.dfh.get_gene_sets_dir(), gene_set_file_path),
+                                       annotation='') for gene_set_file_path in request.geneSetFilePath]
+
+        # The gene sets already enriched are served from the cache right away
+        missing = []
+        for g, gene_set_file_path in zip(gses, request.geneSetFilePath):
+            cache_key = g.get_cache_key()
+            aucs = self.enrichment_cache.get(key=cache_key)
+            if aucs is None:
+                missing.append((g, gene_set_file_path, cache_key))
+                continue
+            reply = g.update_state(step=1.0, status_code=200, status_message=g.get_method() + " enrichment done!", values=aucs)
+            reply.geneSetFilePath = gene_set_file_path
+            yield reply
+        if len(missing) == 0:
+            return
+        gse = missing[0][0]
+
+        # Reading gene sets...
+        yield gse.update_state(step=0, status_code=200, status_message="Reading the gene sets...", values=None)
+        gene_signatures = [g.get_gene_signature(name=gene_set_file_path) for g, gene_set_file_path, _ in missing]
 
+        # Running AUCell on all the gene sets...
+        start_time = time.time()
+        aucs = None
+        for progress, status_message, aucs in self.run_AUCell(gse=gse, loom=loom, gene_signatures=gene_signatures, context=context):
+            if aucs is None:
+                yield gse.update_state(step=progress, status_code=200, status_message=status_message, values=None)
         print("Debug: %s seconds elapsed ---" % (time.time() - start_time))
-        yield gse.update_state(step=4, status_code=200, status_message=gse.get_method() + " enrichment done!", values=aucs)
+        if aucs is None:
+            return
+        for (g, gene_set_file_path, cache_key), gene_set_aucs in zip(missing, aucs):
+            self.enrichment_cache.set(key=cache_key, values=gene_set_aucs)
+            reply = g.update_state(step=1.0, status_code=200, status_message=g.get_method() + " enrichment done!", values=gene_set_aucs)
+            reply.geneSetFilePath = gene_set_file_path
+            yield reply
+
+    def shutdown(self):
+        # Write the remaining UUID log lines (the UUIDs are already stored)
+        self.dfh.get_uuid_log().close()
+        self.dfh.get_session_reaper().stop()
+        self.preparation_executor.shutdown(wait=False)
+        self.compute_backend.shutdown()
+
+    def prepare_loom_async(self, loom_file_path):
+        with self.loom_preparations_lock:
+            preparation = self.loom_preparations.get(loom_file_path)
+            if preparation is not None and not preparation.is_done():
+                return preparation
+            preparation = lpr.LoomPreparation(scope=self,
+                                              loom_file_path=loom_file_path,
+                                              rankings=Constant._LOOM_PREPARATION_RANKINGS,
+                                              optimization=Constant._LOOM_PREPARATION_OPTIMIZE)
+            self.loom_preparations[loom_file_path] = preparation
+        self.preparation_executor.submit(preparation.run)
+        return preparation
 
     def loomUploaded(self, request, content):
         uploadedLooms[request.UUID].add(request.filename)
+        # Derive everything the first views need before the user opens the loom
+        self.prepare_loom_async(loom_file_path=os.path.join(request.UUID, request.filename))
         return s_pb2.LoomUploadedReply()
 
+    def getLoomPreparationStatus(self, request, context):
+        with self.loom_preparations_lock:
+            preparation = self.loom_preparations.get(request.loomFilePath)
+        if preparation is None:
+            # Not uploaded (or not to this server process): nothing to wait for
+            return s_pb2.LoomPreparationStatusReply(loomFilePath=request.loomFilePath, isDone=True)
+        return preparation.get_status_reply()
+
+
+def get_server_options(worker_id):
+    # The workers of the supervisor mode listen on the same port
+    return [('grpc.so_reuseport', 1)] if worker_id is not None else []
+
 
-def serve(run_event, dev_env=False, port=50052, app_mode=False):
+def serve(run_event, dev_env=False, port=50052, app_mode=False, worker_id=None):
     SCope.dev_env = dev_env
     SCope.app_mode = app_mode
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    SCope.worker_id = worker_id
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10), options=get_server_options(worker_id=worker_id))
     scope = SCope()
     s_pb2_grpc.add_MainServicer_to_server(scope, server)
     server.add_insecure_port('[::]:{0}'.format(port))
     # print('Starting GServer on port {0}...'.format(port))
     server.start()
     # Let the main process know that GServer has started.
-    su.send_msg("GServer", "SIGSTART")
+    if worker_id is None or worker_id == 0:
+        su.send_msg("GServer", "SIGSTART")
 
     while run_event.is_set():
         time.sleep(0.1)
 
-    # Write UUIDs to file here
-    scope.dfh.get_uuid_log().close()
-    scope.dfh.update_UUID_db()
     server.stop(0)
+    scope.shutdown()
 
 
 if __name__ == '__main__':
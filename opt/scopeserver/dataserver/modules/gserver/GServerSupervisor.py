@@ -0,0 +1,66 @@
+import time
+import signal
+import threading
+import multiprocessing
+
+
+class GServerSupervisor():
+
+    '''
+    GServerSupervisor class starts n_workers GServer processes listening on the same port (SO_REUSEPORT): the kernel
+    balances the connections between them, the throughput scales with the cores. The workers open the looms
+    read-only and share the sessions through the SQLite session store. Crashed workers are restarted.
+
+    The workers are forked by a fork server (multiprocessing forkserver context): a single-threaded process started
+    with fork+exec. The workers restarted while the other servers of the main process (PServer, XServer) are running
+    are thus not forked from a multi-threaded process.
+    '''
+
+    def __init__(self, serve, n_workers, port, dev_env, app_mode):
+        self.serve = serve
+        self.n_workers = n_workers
+        self.port = port
+        self.dev_env = dev_env
+        self.app_mode = app_mode
+        self.context = multiprocessing.get_context('forkserver')
+        self.workers = {}
+
+    def start(self):
+        for worker_id in range(self.n_workers):
+            self.spawn(worker_id=worker_id)
+
+    def spawn(self, worker_id):
+        worker = self.context.Process(target=GServerSupervisor.run_worker,
+                                      kwargs={'serve': self.serve, 'worker_id': worker_id, 'port': self.port, 'dev_env': self.dev_env, 'app_mode': self.app_mode},
+                                      name='GServer-{0}'.format(worker_id))
+        worker.start()
+        print("Started GServer worker {0} (pid {1}).".format(worker_id, worker.pid))
+        self.workers[worker_id] = worker
+
+    @staticmethod
+    def run_worker(serve, worker_id, port, dev_env, app_mode):
+        run_event = threading.Event()
+        run_event.set()
+        # Stopped by the supervisor
+        signal.signal(signal.SIGTERM, lambda signum, frame: run_event.clear())
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        serve(run_event, dev_env, port=port, app_mode=app_mode, worker_id=worker_id)
+
+    def run(self, run_event):
+        while run_event.is_set():
+            for worker_id, worker in list(self.workers.items()):
+                if worker.is_alive():
+                    continue
+                worker.join()
+                if run_event.is_set():
+                    print("GServer worker {0} (pid {1}) exited with code {2}, restarting it...".format(worker_id, worker.pid, worker.exitcode))
+                    self.spawn(worker_id=worker_id)
+            time.sleep(0.5)
+        self.stop()
+
+    def stop(self):
+        for worker in self.workers.values():
+            worker.terminate()
+        for worker in self.workers.values():
+            worker.join()
+        self.workers = {}
@@ -34,6 +34,11 @@ class MainStub(object):
         request_serializer=s__pb2.FeatureRequest.SerializeToString,
         response_deserializer=s__pb2.FeatureReply.FromString,
         )
+    self.getFeaturesStream = channel.stream_stream(
+        '/scope.Main/getFeaturesStream',
+        request_serializer=s__pb2.FeatureRequest.SerializeToString,
+        response_deserializer=s__pb2.FeatureReply.FromString,
+        )
     self.getCoordinates = channel.unary_unary(
         '/scope.Main/getCoordinates',
         request_serializer=s__pb2.CoordinatesRequest.SerializeToString,
@@ -69,6 +74,11 @@ class MainStub(object):
         request_serializer=s__pb2.GeneSetEnrichmentRequest.SerializeToString,
         response_deserializer=s__pb2.GeneSetEnrichmentReply.FromString,
         )
+    self.doGeneSetsEnrichment = channel.unary_stream(
+        '/scope.Main/doGeneSetsEnrichment',
+        request_serializer=s__pb2.GeneSetsEnrichmentRequest.SerializeToString,
+        response_deserializer=s__pb2.GeneSetEnrichmentReply.FromString,
+        )
     self.getVmax = channel.unary_unary(
         '/scope.Main/getVmax',
         request_serializer=s__pb2.VmaxRequest.SerializeToString,
@@ -89,6 +99,11 @@ class MainStub(object):
         request_serializer=s__pb2.LoomUploadedRequest.SerializeToString,
         response_deserializer=s__pb2.LoomUploadedReply.FromString,
         )
+    self.getLoomPreparationStatus = channel.unary_unary(
+        '/scope.Main/getLoomPreparationStatus',
+        request_serializer=s__pb2.LoomPreparationStatusRequest.SerializeToString,
+        response_deserializer=s__pb2.LoomPreparationStatusReply.FromString,
+        )
     self.getMyGeneSets = channel.unary_unary(
         '/scope.Main/getMyGeneSets',
         request_serializer=s__pb2.MyGeneSetsRequest.SerializeToString,
@@ -138,6 +153,13 @@ class MainServicer(object):
     context.set_details('Method not implemented!')
     raise NotImplementedError('Method not implemented!')
 
+  def getFeaturesStream(self, request_iterator, context):
+    # missing associated documentation comment in .proto file
+    pass
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
   def getCoordinates(self, request, context):
     # missing associated documentation comment in .proto file
     pass
@@ -187,6 +209,13 @@ class MainServicer(object):
     context.set_details('Method not implemented!')
     raise NotImplementedError('Method not implemented!')
 
+  def doGeneSetsEnrichment(self, request, context):
+    # missing associated documentation comment in .proto file
+    pass
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
   def getVmax(self, request, context):
     # missing associated documentation comment in .proto file
     pass
@@ -215,6 +244,13 @@ class MainServicer(object):
     context.set_details('Method not implemented!')
     raise NotImplementedError('Method not implemented!')
 
+  def getLoomPreparationStatus(self, request, context):
+    # missing associated documentation comment in .proto file
+    pass
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
   def getMyGeneSets(self, request, context):
     # missing associated documentation comment in .proto file
     pass
@@ -259,6 +295,11 @@ def add_MainServicer_to_server(servicer, server):
           request_deserializer=s__pb2.FeatureRequest.FromString,
           response_serializer=s__pb2.FeatureReply.SerializeToString,
       ),
+      'getFeaturesStream': grpc.stream_stream_rpc_method_handler(
+          servicer.getFeaturesStream,
+          request_deserializer=s__pb2.FeatureRequest.FromString,
+          response_serializer=s__pb2.FeatureReply.SerializeToString,
+      ),
       'getCoordinates': grpc.unary_unary_rpc_method_handler(
           servicer.getCoordinates,
           request_deserializer=s__pb2.CoordinatesRequest.FromString,
@@ -294,6 +335,11 @@ def add_MainServicer_to_server(servicer, server):
           request_deserializer=s__pb2.GeneSetEnrichmentRequest.FromString,
           response_serializer=s__pb2.GeneSetEnrichmentReply.SerializeToString,
       ),
+      'doGeneSetsEnrichment': grpc.unary_stream_rpc_method_handler(
+          servicer.doGeneSetsEnrichment,
+          request_deserializer=s__pb2.GeneSetsEnrichmentRequest.FromString,
+          response_serializer=s__pb2.GeneSetEnrichmentReply.SerializeToString,
+      ),
       'getVmax': grpc.unary_unary_rpc_method_handler(
           servicer.getVmax,
           request_deserializer=s__pb2.VmaxRequest.FromString,
@@ -314,6 +360,11 @@ def add_MainServicer_to_server(servicer, server):
           request_deserializer=s__pb2.LoomUploadedRequest.FromString,
           response_serializer=s__pb2.LoomUploadedReply.SerializeToString,
       ),
+      'getLoomPreparationStatus': grpc.unary_unary_rpc_method_handler(
+          servicer.getLoomPreparationStatus,
+          request_deserializer=s__pb2.LoomPreparationStatusRequest.FromString,
+          response_serializer=s__pb2.LoomPreparationStatusReply.SerializeToString,
+      ),
       'getMyGeneSets': grpc.unary_unary_rpc_method_handler(
           servicer.getMyGeneSets,
           request_deserializer=s__pb2.MyGeneSetsRequest.FromString,
@@ -8,22 +8,24 @@ import macpath
 import ntpath
 import base64
 import functools
-import cgi
-import tempfile
 import time
+import re
 from http import server as httpserver
 import socketserver
 from urllib import parse as urllibparse
-import loompy as lp
 from pathlib import Path
 import threading
 
 from scopeserver.utils import DataFileHandler as dfh
 from scopeserver.dataserver.modules.gserver import GServer
 from scopeserver.utils import SysUtils as su
+from scopeserver.utils import Constant
+from scopeserver.utils import MultipartUploadParser as mup
 
 unicode = str
 
+_BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
 
 def _decode_str_if_py2(inputstr, encoding='utf-8'):
     "Will return decoded with given encoding *if* input is a string and it's Py2."
@@ -79,50 +81,8 @@ class Abort(Exception):
     "Used by handle to rethrow exceptions in ThreadedHTTPServer."
 
 
-class DroopyFieldStorage(cgi.FieldStorage):
-    """
-    The file is created in the destination directory and its name is
-    stored in the tmpfilename attribute.
-
-    Adds a keyword-argument "directory", which is where files are to be
-    stored. Because of CGI magic this might not be thread-safe.
-    """
-
-    TMPPREFIX = 'tmpdroopy'
-
-    # Would love to do a **kwargs job here but cgi has some recursive
-    # magic that passes all possible arguments positionally..
-    def __init__(self, fp=None, headers=None, outerboundary=b'',
-                 environ=os.environ, keep_blank_values=0, strict_parsing=0,
-                 limit=None, encoding='utf-8', errors='replace',
-                 directory='.'):
-        """
-        Adds 'directory' argument to FieldStorage.__init__.
-        Retains compatibility with FieldStorage.__init__ (which involves magic)
-        """
-        self.directory = directory
-        # Not only is cgi.FieldStorage full of magic, it's DIFFERENT
-        # magic in Py2/Py3. Here's a case of the core library making
-        # life difficult, in a class that's *supposed to be subclassed*!
-        if sys.version_info > (3,):
-            cgi.FieldStorage.__init__(self, fp, headers, outerboundary,
-                                      environ, keep_blank_values,
-                                      strict_parsing, limit, encoding, errors)
-        else:
-            cgi.FieldStorage.__init__(self, fp, headers, outerboundary,
-                                      environ, keep_blank_values,
-                                      strict_parsing)
-
-    # Binary is passed in Py2 but not Py3.
-    def make_file(self, binary=None):
-        "Overrides builtin method to store tempfile in the set directory."
-        fd, name = tempfile.mkstemp(dir=self.directory, prefix=self.TMPPREFIX)
-        # Pylint doesn't like these if they're not declared in __init__ first,
-        # but setting tmpfile there leads to odd errors where it's never re-set
-        # to a file descriptor.
-        self.tmpfile = os.fdopen(fd, 'w+b')
-        self.tmpfilename = name
-        return self.tmpfile
+class UnsupportedUpload(Exception):
+    "Used by get_upload_directory to reject the upload of an unknown file type."
 
 
 class HTTPUploadHandler(httpserver.BaseHTTPRequestHandler):
@@ -206,14 +166,10 @@ class HTTPUploadHandler(httpserver.BaseHTTPRequestHandler):
         # Include ability to self-define "special method" prefix path?
         # TODO Verify that this is path-injection proof
         localpath = _encode_str_if_py2(os.path.join(self.directory, name), "utf-8")
-        with open(localpath, 'rb') as f:
-            self.send_resp_headers(200,
-                                    {'Content-length': os.fstat(f.fileno())[6],
-                                    'Access-Control-Allow-Origin': '*',
-                                    'Content-type': 'application/x-hdf5',
-                                    'Content-Disposition': 'attachment; filename="' + os.path.basename(name) + '""'},
-                                    end=True)
-            shutil.copyfileobj(f, self.wfile)
+        self.send_data_file(localpath,
+                            {'Access-Control-Allow-Origin': '*',
+                             'Content-type': 'application/x-hdf5',
+                             'Content-Disposition': 'attachment; filename="' + os.path.basename(name) + '""'})
 
     @check_auth
     def _set_headers(self):
@@ -229,106 +185,89 @@ class HTTPUploadHandler(httpserver.BaseHTTPRequestHandler):
         self.send_header("Access-Control-Allow-Headers", "X-Requested-With")
         self.send_header("Access-Control-Allow-Headers", "Content-Type")
         self.send_header("Access-Control-Allow-Headers", "Content-Disposition")
+        self.send_header("Access-Control-Allow-Headers", "Range")
+        self.send_header("Access-Control-Allow-Headers", "If-Range")
         self.end_headers()
 
+    def get_upload_directory(self, fields):
+        "Destination directory of the uploaded files, given the form fields preceding them."
+        if fields.get('file-type') not in dfh.DataFileHandler.get_data_dirs().keys():
+            raise UnsupportedUpload(fields.get('file-type'))
+        self.directory = dfh.DataFileHandler.get_data_dir_path_by_file_type(file_type=fields.get('file-type'), UUID=fields.get('UUID'))
+        self.log_message("Saving uploaded file in " + self.directory)
+        return self.directory
+
     @check_auth
     def do_POST(self):
         "Standard method to override in this Server object."
-        # try:
         self.log_message("Started file transfer")
-        form = DroopyFieldStorage(fp=self.rfile,
-                                    directory='',
-                                    headers=self.headers,
-                                    environ={'REQUEST_METHOD': self.command})
+        try:
+            form = mup.MultipartUploadParser(fp=self.rfile,
+                                             headers=self.headers,
+                                             get_directory=self.get_upload_directory).parse()
+        except UnsupportedUpload:
+            self.send_error(415, "Unsupported file type")
+            return None
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return None
 
         if 'loomFilePath' in form.keys():
             self.directory = dfh.DataFileHandler.get_data_dir_path_by_file_type(file_type=form.getvalue('file-type'))
             localpath = _encode_str_if_py2(os.path.join(self.directory, form.getvalue('loomFilePath')), "utf-8")
-            with open(localpath, 'rb') as f:
-                self.send_resp_headers(200,
-                                        {'Content-length': os.fstat(f.fileno())[6],
-                                        'Access-Control-Allow-Origin': '*',
-                                        'Content-type': 'application/x-hdf5'},
-                                        end=True)
-                shutil.copyfileobj(f, self.wfile)
-        else:
-            if form.getvalue('file-type') in dfh.DataFileHandler.get_data_dirs().keys():
-                self.directory = dfh.DataFileHandler.get_data_dir_path_by_file_type(file_type=form.getvalue('file-type'), UUID=form.getvalue('UUID'))
-            else:
-                self.send_error(415, "Unsupported file tyype")
-            # Update the directory of DroopyFieldStorage
-            form.directory = self.directory
-            self.log_message("Saving uploaded file in " + self.directory)
-            file_items = form[self.form_field]
-
-            # Handle multiple file upload
-            if not isinstance(file_items, list):
-                file_items = [file_items]
-            for item in file_items:
-                filename = _decode_str_if_py2(basename(item.filename), "utf-8")
-                if filename == "":
-                    continue
-                localpath = _encode_str_if_py2(os.path.join(self.directory, filename), "utf-8")
-                root, ext = os.path.splitext(localpath)
-                i = 1
-                # TODO: race condition...
-                while os.path.exists(localpath):
-                    localpath = "%s-%d%s" % (root, i, ext)
-                    i = i + 1
-                if hasattr(item, 'tmpfile'):
-                    # DroopyFieldStorage.make_file() has been called
-                    item.tmpfile.close()
-                    shutil.move(item.tmpfilename, localpath)
-                else:
-                    # no temporary file, self.file is a StringIO()
-                    # see cgi.FieldStorage.read_lines()
-                    with open(localpath, "wb") as fout:
-                        shutil.copyfileobj(item.file, fout)
-                if self.file_mode is not None:
-                    os.chmod(localpath, self.file_mode)
-                self.log_message("Received: %s", os.path.basename(localpath))
-
-            # -- Reply
-            # The file list gives a feedback for the upload success
-            ctype = mimetypes.guess_type(localpath)[0]
-            try:
-                # Always read in binary mode. Opening files in text mode may cause
-                # newline translations, making the actual size of the content
-                # transmitted *less* than the content-length!
-                if form.getvalue('file-type') == 'Loom':
-                    try:
-                        with lp.connect(localpath) as f:
-                            self.log_message('Loom dimensions: {0}'.format(f.shape))
-                            if not (f.shape[0] > 0 and f.shape[1] > 0):
-                                raise KeyError
-                            else:
-                                f = open(localpath, 'rb')
-                    except (KeyError, OSError):
-                        os.remove(localpath)
-                        self.send_response(415, message='Upload Corrupt')
-                        self.send_header('Access-Control-Allow-Origin', '*')
-                        self.end_headers()
-                        return None
-                else:
-                    self.log_message('Not a loom: {0}'.format(form.getvalue('file-type')))
-                    f = open(localpath, 'rb')
-            except IOError:
-                self.send_error(404, "File not found")
+            self.send_data_file(localpath,
+                                {'Access-Control-Allow-Origin': '*',
+                                 'Content-type': 'application/x-hdf5'})
+            return None
+
+        # Handle multiple file upload
+        uploaded_files = []
+        for item in form.files:
+            filename = _decode_str_if_py2(basename(item.filename), "utf-8")
+            if filename == "" or item.size == 0:
+                item.remove()
+                continue
+            # Validated on the fly: the HDF5 signature has been looked for while receiving the file
+            if form.getvalue('file-type') == 'Loom' and not item.is_hdf5():
+                for uploaded_file in form.files:
+                    uploaded_file.remove()
+                self.log_message('Upload corrupt, not an HDF5 file: {0}'.format(filename))
+                self.send_response(415, message='Upload Corrupt')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
                 return None
-            # Send correct HTTP headers and Allow CROS Origin
-            fs = os.fstat(f.fileno())
-            headers = {
-                        # 'Location': '/',
-                        # 'File-Path': localpath,
-                        'Access-Control-Allow-Origin': '*',
-                        'Content-Type': 'application/json',
-                        'Content-Length': 0,
-                        'Last-modified': self.date_time_string(fs.st_mtime)
-                        }
-            self.send_resp_headers(200, headers, end=True)
-
-        # except Exception as e:
-            # self.log_message(">>>" + repr(e))
+            uploaded_files.append((filename, item))
+
+        for filename, item in uploaded_files:
+            localpath = _encode_str_if_py2(os.path.join(item.directory, filename), "utf-8")
+            root, ext = os.path.splitext(localpath)
+            i = 1
+            # TODO: race condition...
+            while os.path.exists(localpath):
+                localpath = "%s-%d%s" % (root, i, ext)
+                i = i + 1
+            # Same directory: renamed, not copied
+            item.move(localpath)
+            if self.file_mode is not None:
+                os.chmod(localpath, self.file_mode)
+            self.log_message("Received: %s (%d bytes, md5 %s)", os.path.basename(localpath), item.size, item.get_md5_hash())
+
+        if len(uploaded_files) == 0:
+            self.send_error(404, "File not found")
+            return None
+
+        # -- Reply
+        # The file list gives a feedback for the upload success
+        fs = os.stat(localpath)
+        headers = {
+                    'Access-Control-Allow-Origin': '*',
+                    'Access-Control-Expose-Headers': 'Content-MD5',
+                    'Content-Type': 'application/json',
+                    'Content-Length': 0,
+                    'Content-MD5': base64.b64encode(bytes.fromhex(item.get_md5_hash())).decode('ascii'),
+                    'Last-modified': self.date_time_string(fs.st_mtime)
+                    }
+        self.send_resp_headers(200, headers, end=True)
 
     def send_resp_headers(self, response_code, headers_dict, end=False):
         "Just a shortcut for a common operation."
@@ -338,6 +277,86 @@ class HTTPUploadHandler(httpserver.BaseHTTPRequestHandler):
         if end:
             self.end_headers()
 
+    def get_byte_range(self, size, etag, last_modified):
+        """Parse the Range header of the request (a single byte range) against a file of the given size.
+
+        The range is ignored (i.e.: the whole file is sent) if the file changed since the If-Range validator was
+        given, if it is not a single byte range or if it is malformed.
+
+        Returns:
+            tuple: (start, end) of the range (end included), None for the whole file or False if not satisfiable.
+
+        """
+        range_header = self.get_case_insensitive_header('Range', None)
+        if range_header is None:
+            return None
+        if_range = self.get_case_insensitive_header('If-Range', None)
+        if if_range is not None and if_range.strip() not in (etag, last_modified):
+            return None
+        match = _BYTE_RANGE.match(range_header.replace(' ', ''))
+        if match is None or match.group(1) == match.group(2) == '':
+            return None
+        if match.group(1) == '':
+            # Suffix range: last bytes of the file
+            length = int(match.group(2))
+            if length == 0 or size == 0:
+                return False
+            return max(size - length, 0), size - 1
+        start = int(match.group(1))
+        if match.group(2) != '' and int(match.group(2)) < start:
+            return None
+        if start >= size:
+            return False
+        end = size - 1 if match.group(2) == '' else min(int(match.group(2)), size - 1)
+        return start, end
+
+    def copy_file(self, f, offset, count):
+        "Sends count bytes of f from offset: zero-copy (sendfile) on plain sockets, copied through a buffer on TLS."
+        self.wfile.flush()
+        if hasattr(self.connection, 'sendfile'):
+            # socket.sendfile uses os.sendfile when available, send() otherwise (e.g.: SSL sockets)
+            self.connection.sendfile(f, offset=offset, count=count)
+            return
+        f.seek(offset)
+        while count > 0:
+            chunk = f.read(min(count, Constant._DOWNLOAD_CHUNK_SIZE))
+            if not chunk:
+                break
+            self.wfile.write(chunk)
+            count -= len(chunk)
+
+    def send_data_file(self, localpath, headers_dict):
+        "Sends the file at localpath, or the byte range of it requested with Range/If-Range (206 Partial Content)."
+        try:
+            f = open(localpath, 'rb')
+        except IOError:
+            self.send_error(404, "File not found")
+            return None
+        with f:
+            fs = os.fstat(f.fileno())
+            etag = '"{0:x}-{1:x}"'.format(fs.st_mtime_ns, fs.st_size)
+            last_modified = self.date_time_string(fs.st_mtime)
+            headers = dict(headers_dict)
+            headers.update({'Accept-Ranges': 'bytes',
+                            'ETag': etag,
+                            'Last-Modified': last_modified,
+                            'Access-Control-Expose-Headers': 'Accept-Ranges, Content-Range, Content-Length, ETag'})
+            byte_range = self.get_byte_range(size=fs.st_size, etag=etag, last_modified=last_modified)
+            if byte_range is False:
+                headers.pop('Content-Disposition', None)
+                headers.update({'Content-Range': 'bytes */{0}'.format(fs.st_size), 'Content-Length': 0})
+                self.send_resp_headers(416, headers, end=True)
+                return None
+            if byte_range is None:
+                response_code, (start, end) = 200, (0, fs.st_size - 1)
+            else:
+                response_code, (start, end) = 206, byte_range
+                headers['Content-Range'] = 'bytes {0}-{1}/{2}'.format(start, end, fs.st_size)
+            headers['Content-Length'] = end - start + 1
+            self.send_resp_headers(response_code, headers, end=True)
+            if end >= start:
+                self.copy_file(f, offset=start, count=end - start + 1)
+
     def send_html(self, htmlstr):
         "Simply returns htmlstr with the appropriate content-type/status."
         self.send_resp_headers(200, {'Content-type': 'text/html; charset=utf-8'}, end=True)
@@ -357,7 +376,7 @@ class HTTPUploadHandler(httpserver.BaseHTTPRequestHandler):
         names = []
         # In py2, listdir() returns strings when the directory is a string.
         for name in os.listdir(unicode(self.directory)):
-            if name.startswith(DroopyFieldStorage.TMPPREFIX):
+            if name.startswith(mup.UploadedFile.TMPPREFIX):
                 continue
             npath = os.path.join(self.directory, name)
             if os.path.isfile(npath):
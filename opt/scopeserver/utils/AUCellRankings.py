@@ -0,0 +1,183 @@
+import os
+import threading
+import numpy as np
+from collections import deque
+from pyscenic.recovery import derive_rank_cutoff
+
+from scopeserver.utils import Constant
+from scopeserver.utils.ComputeBackend import ComputeBackend
+
+
+def get_rankings_dtype(n_genes):
+    # The padding cells of the last block are ranked n_genes: it must fit as well
+    return np.uint16 if n_genes <= np.iinfo(np.uint16).max else np.uint32
+
+
+def rank_block(vals, permutation):
+    """Rank the genes of each cell of the given block (n_genes x n_cells).
+
+    Same ranking as pyscenic's create_rankings: 0-based, in descending order of expression, ties are broken by the
+    order of the shuffled genes (permutation).
+
+    Returns:
+        ndarray: The rankings of the block (n_genes x n_cells).
+
+    """
+    n_genes, n_cells = vals.shape
+    dtype = get_rankings_dtype(n_genes=n_genes)
+    shuffled = np.transpose(vals)[:, permutation]
+    # Stable sort: ties keep the (shuffled) order of the genes
+    order = np.argsort(-shuffled, axis=1, kind='mergesort')
+    rankings = np.empty((n_genes, n_cells), dtype=dtype)
+    rankings[permutation[order], np.arange(n_cells)[:, np.newaxis]] = np.arange(n_genes, dtype=dtype)
+    return rankings
+
+
+def rank_block_into(vals, permutation, file_path, block):
+    # Run by a worker process: the rankings are written into the rankings file, not sent back
+    matrix = np.load(file_path, mmap_mode='r+')
+    matrix[block, :, :vals.shape[1]] = rank_block(vals=vals, permutation=permutation)
+    matrix.flush()
+
+
+def score_blocks(file_path, union, weights, rank_cutoff, start, end, aucs_file_path):
+    """Score the blocks [start, end) of the rankings for the given signatures (weights: n_signatures x union). Run by
+    a worker process: the (not normalized) AUCs are written into the shared array located at aucs_file_path."""
+    matrix = np.load(file_path, mmap_mode='r')
+    aucs = ComputeBackend.open_shared_array(file_path=aucs_file_path)
+    block_size = matrix.shape[2]
+    for block in range(start, end):
+        rankings = matrix[block, union, :].astype(np.int64)
+        window = np.where(rankings < rank_cutoff, rank_cutoff - rankings, 0)
+        aucs[:, block * block_size:(block + 1) * block_size] = np.dot(weights, window)
+    aucs.flush()
+
+
+class AUCellRankings():
+
+    '''
+    AUCellRankings class builds and reads the AUCell rankings of a loom.
+
+    The rankings are built per block of cells: the blocks are read from the loom by the calling thread, ranked by the
+    processes of the compute backend which write them directly to the rankings file. Memory is bounded by the number
+    of blocks in flight, throughput scales with the number of processes.
+
+    The rankings are stored as a .npy array of shape (n_blocks, n_genes, block_size) in the smallest unsigned dtype
+    that fits (uint16 up to 65535 genes). The file is memory-mapped: scoring a gene signature only reads the rows of
+    its genes in each block. The cells padding the last block are ranked n_genes.
+    '''
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+    def get_file_path(self):
+        return self.file_path
+
+    def exists(self):
+        return os.path.exists(self.file_path)
+
+    @staticmethod
+    def get_permutation(n_genes):
+        # Fixed seed: the rankings of a loom are reproducible
+        return np.random.RandomState(seed=Constant._AUCELL_RANKINGS_SEED).permutation(n_genes)
+
+    def build(self, loom, compute_backend):
+        """Build the rankings of the given loom.
+
+        Yields:
+            float: The fraction of the cells ranked so far.
+
+        """
+        loom_connection = loom.get_connection()
+        n_genes, n_cells = loom_connection.shape
+        block_size = Constant._AUCELL_BLOCK_SIZE
+        permutation = AUCellRankings.get_permutation(n_genes=n_genes)
+        n_processes = compute_backend.get_nb_processes()
+        tmp_file_path = self.file_path + '.tmp{0}_{1}'.format(os.getpid(), threading.get_ident())
+        try:
+            matrix = np.lib.format.open_memmap(tmp_file_path,
+                                               mode='w+',
+                                               dtype=get_rankings_dtype(n_genes=n_genes),
+                                               shape=(max(-(-n_cells // block_size), 1), n_genes, block_size))
+            matrix[-1, :, :] = n_genes
+            matrix.flush()
+            pending = deque()
+            # Read bands of several blocks: a chunk spanning many cells (e.g.: optimized loom) is not read once per block
+            band_size = max(Constant._MATRIX_READ_BAND_SIZE // (max(n_genes, 1) * 4 * block_size), 1) * block_size
+            for band_start in range(0, n_cells, band_size):
+                band = loom_connection[:, band_start:min(band_start + band_size, n_cells)]
+                for start in range(band_start, min(band_start + band_size, n_cells), block_size):
+                    end = min(start + block_size, n_cells)
+                    vals = band[:, start - band_start:end - band_start].astype(np.float32)
+                    pending.append((end, compute_backend.submit(rank_block_into, vals, permutation, tmp_file_path, start // block_size)))
+                    # Bound the number of blocks in memory
+                    while len(pending) >= 2 * n_processes:
+                        yield self.wait_block(block=pending.popleft(), total=n_cells)
+                del band
+            while len(pending) > 0:
+                yield self.wait_block(block=pending.popleft(), total=n_cells)
+            del matrix
+            os.replace(tmp_file_path, self.file_path)
+        finally:
+            if os.path.exists(tmp_file_path):
+                os.remove(tmp_file_path)
+
+    def wait_block(self, block, total):
+        end, result = block
+        result.get()
+        return end / total
+
+    def open(self):
+        return np.load(self.file_path, mmap_mode='r')
+
+    def get_nb_cells(self, matrix):
+        return matrix.shape[0] * matrix.shape[2] - int(np.sum(matrix[-1, 0, :] == matrix.shape[1]))
+
+    def get_batch_aucs(self, genes, gene_signatures, compute_backend, auc_threshold=0.05):
+        """Compute the AUCs of the given gene signatures for all the cells of the loom in a single pass over the rankings.
+
+        The AUC of a cell is linear in the ranks of the top-ranked window (ranks below the cutoff): it is the sum of
+        weight * (cutoff - rank) over the genes of the signature in the window, divided by the maximum AUC. Each block
+        of cells is read once for the union of the genes of all the signatures and scored for all of them at once, by
+        the processes of the compute backend. Same AUCs as pyscenic's enrichment4cells (including the 80% coverage rule).
+
+        Yields:
+            tuple: The fraction of the cells scored so far and the AUCs (n_signatures x n_cells) once all the cells
+                are scored (None before).
+
+        """
+        matrix = self.open()
+        n_blocks, n_genes, block_size = matrix.shape
+        if len(genes) != n_genes:
+            raise ValueError("The rankings {0} do not match the loom: {1} genes expected.".format(self.file_path, len(genes)))
+        n_cells = self.get_nb_cells(matrix=matrix)
+        rank_cutoff = derive_rank_cutoff(auc_threshold, n_genes)
+        # Weights of the signatures (n_signatures x n_genes of the union)
+        signature_gene_indices = []
+        for gene_signature in gene_signatures:
+            gene_indices = np.where(np.isin(genes, list(gene_signature.genes)))[0]
+            if len(gene_indices) == 0 or float(len(gene_indices)) / len(gene_signature) < 0.80:
+                print("Less than 80% of the genes in {0} are present in the expression matrix.".format(gene_signature.name))
+                gene_indices = gene_indices[:0]
+            signature_gene_indices.append(gene_indices)
+        union = np.unique(np.concatenate(signature_gene_indices)) if len(signature_gene_indices) > 0 else np.array([], dtype=np.int64)
+        weights = np.zeros((len(gene_signatures), len(union)), dtype=np.float64)
+        for i, (gene_signature, gene_indices) in enumerate(zip(gene_signatures, signature_gene_indices)):
+            weights[i, np.searchsorted(union, gene_indices)] = [gene_signature[gene] for gene in genes[gene_indices]]
+        max_aucs = (rank_cutoff + 1) * weights.sum(axis=1)
+        max_aucs[max_aucs == 0] = 1
+        aucs_file_path, aucs = compute_backend.create_shared_array(shape=(len(gene_signatures), n_blocks * block_size), dtype=np.float64)
+        try:
+            if len(union) > 0:
+                pending = deque()
+                for start in range(0, n_blocks, Constant._AUCELL_SCORE_BLOCKS):
+                    end = min(start + Constant._AUCELL_SCORE_BLOCKS, n_blocks)
+                    pending.append((end, compute_backend.submit(score_blocks, self.file_path, union, weights, rank_cutoff, start, end, aucs_file_path)))
+                    while len(pending) >= 2 * compute_backend.get_nb_processes():
+                        yield self.wait_block(block=pending.popleft(), total=n_blocks), None
+                while len(pending) > 0:
+                    yield self.wait_block(block=pending.popleft(), total=n_blocks), None
+            yield 1.0, aucs[:, :n_cells] / max_aucs[:, np.newaxis]
+        finally:
+            del aucs
+            compute_backend.remove_shared_array(file_path=aucs_file_path)
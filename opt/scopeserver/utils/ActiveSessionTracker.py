@@ -0,0 +1,81 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class ActiveSessionTracker():
+
+    '''
+    ActiveSessionTracker class keeps the active sessions ordered by last activity (least recent first): touching a
+    session moves it to the end, expired sessions are popped from the front. Touch, count and admission are O(1)
+    (amortized for the expiry).
+    '''
+
+    def __init__(self, timeout, limit):
+        self.timeout = timeout
+        self.limit = limit
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+        self.peak = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def expire(self):
+        expiry_time = time.time() - self.timeout
+        while len(self.sessions) > 0:
+            UUID, last_activity = next(iter(self.sessions.items()))
+            if last_activity > expiry_time:
+                break
+            self.sessions.popitem(last=False)
+
+    def touch(self, UUID):
+        self.sessions[UUID] = time.time()
+        self.sessions.move_to_end(UUID)
+        self.peak = max(self.peak, len(self.sessions))
+
+    def admit(self, UUID, active, permanent=False):
+        """Admit the given session if it is already active or if the limit of active sessions is not reached.
+
+        Args:
+            active (bool): Whether the user interacted with the session (resets its timeout).
+            permanent (bool): Whether it is a permanent session ID (never limited).
+
+        Returns:
+            bool: True if the session is admitted, False if the limit of active sessions is reached.
+
+        """
+        with self.lock:
+            self.expire()
+            if UUID in self.sessions:
+                if active:
+                    self.touch(UUID=UUID)
+                return True
+            if permanent or len(self.sessions) < self.limit:
+                self.touch(UUID=UUID)
+                self.admitted += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def remove(self, UUID):
+        with self.lock:
+            self.sessions.pop(UUID, None)
+
+    def __contains__(self, UUID):
+        with self.lock:
+            self.expire()
+            return UUID in self.sessions
+
+    def __len__(self):
+        with self.lock:
+            self.expire()
+            return len(self.sessions)
+
+    def get_metrics(self):
+        with self.lock:
+            self.expire()
+            return {'current': len(self.sessions),
+                    'peak': self.peak,
+                    'limit': self.limit,
+                    'admitted': self.admitted,
+                    'rejected': self.rejected}
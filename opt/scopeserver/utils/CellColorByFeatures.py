@@ -31,6 +31,18 @@ class CellColorByFeatures():
             vmax = 0.01
         return vmax, maxVmax
 
+    def get_feature_vmax(self, request, feature_type, feature, vals):
+        # Use the precomputed statistics of the loom (merged sketches of the annotation values if any)
+        vmax = self.loom.get_statistics().get_vmax(feature_type=feature_type,
+                                                   feature=feature,
+                                                   log_transform=request.hasLogTransform,
+                                                   cpm_normalise=request.hasCpmTransform,
+                                                   annotation=request.annotation,
+                                                   logic=request.logic)
+        if vmax is not None:
+            return vmax
+        return CellColorByFeatures.get_vmax(vals)
+
     @staticmethod
     def compress_str_array(str_arr):
         print("Compressing... ")
@@ -80,7 +92,7 @@ class CellColorByFeatures():
             if request.vmax[n] != 0.0:
                 self.v_max[n] = request.vmax[n]
             else:
-                self.v_max[n], self.max_v_max[n] = CellColorByFeatures.get_vmax(vals)
+                self.v_max[n], self.max_v_max[n] = self.get_feature_vmax(request=request, feature_type='gene', feature=feature, vals=vals)
             # vals = np.round((vals / vmax[n]) * 225)
             vals = vals / self.v_max[n]
             vals = (((Constant._UPPER_LIMIT_RGB - Constant._LOWER_LIMIT_RGB) * (vals - min(vals))) / (1 - min(vals))) + Constant._LOWER_LIMIT_RGB
@@ -96,7 +108,7 @@ class CellColorByFeatures():
             if request.vmax[n] != 0.0:
                 self.v_max[n] = request.vmax[n]
             else:
-                self.v_max[n], self.max_v_max[n] = CellColorByFeatures.get_vmax(vals)
+                self.v_max[n], self.max_v_max[n] = self.get_feature_vmax(request=request, feature_type='regulon', feature=feature, vals=vals)
             if request.scaleThresholded:
                 vals = ([auc if auc >= request.threshold[n] else 0 for auc in vals])
                 # vals = np.round((vals / vmax[n]) * 225)
@@ -134,7 +146,7 @@ class CellColorByFeatures():
             if request.vmax[n] != 0.0:
                 self.v_max[n] = request.vmax[n]
             else:
-                self.v_max[n], self.max_v_max[n] = CellColorByFeatures.get_vmax(vals)
+                self.v_max[n], self.max_v_max[n] = self.get_feature_vmax(request=request, feature_type='metric', feature=feature, vals=vals)
             # vals = np.round((vals / vmax[n]) * 225)
             vals = vals / self.v_max[n]
             vals = (((Constant._UPPER_LIMIT_RGB - Constant._LOWER_LIMIT_RGB) * (vals - min(vals))) / (1 - min(vals))) + Constant._LOWER_LIMIT_RGB
@@ -0,0 +1,75 @@
+import os
+import uuid
+import tempfile
+import threading
+import multiprocessing
+import numpy as np
+
+_SHARED_MEMORY_DIR = '/dev/shm'
+
+
+class ComputeBackend():
+
+    '''
+    ComputeBackend class is the process tier of the server: CPU-heavy work (e.g.: ranking cells, scoring gene sets)
+    is submitted to a pool of worker processes instead of competing for the GIL with the threads serving the RPCs.
+
+    The pool is started lazily, with the forkserver start method (forking the threads of the gRPC server is unsafe).
+    Large results do not come back pickled: the workers write them into shared arrays (memory-mapped .npy files in
+    /dev/shm) created by the caller.
+    '''
+
+    def __init__(self, n_processes):
+        self.n_processes = max(1, min(n_processes, os.cpu_count() or 1))
+        self.pool = None
+        self.lock = threading.Lock()
+
+    def get_nb_processes(self):
+        return self.n_processes
+
+    def get_pool(self):
+        with self.lock:
+            if self.pool is None:
+                self.pool = multiprocessing.get_context('forkserver').Pool(processes=self.n_processes)
+            return self.pool
+
+    def submit(self, fn, *args):
+        """Run fn(*args) in a worker process.
+
+        Returns:
+            AsyncResult: The result of the call (get() it).
+
+        """
+        return self.get_pool().apply_async(fn, args)
+
+    @staticmethod
+    def get_shared_dir():
+        return _SHARED_MEMORY_DIR if os.path.isdir(_SHARED_MEMORY_DIR) else tempfile.gettempdir()
+
+    def create_shared_array(self, shape, dtype):
+        """Create an array shared with the worker processes (they open it with open_shared_array).
+
+        Returns:
+            tuple: The path of the shared array and the array (memory-mapped). The caller removes it once done.
+
+        """
+        file_path = os.path.join(ComputeBackend.get_shared_dir(), 'scope-{0}-{1}.npy'.format(os.getpid(), uuid.uuid4().hex))
+        return file_path, np.lib.format.open_memmap(file_path, mode='w+', dtype=dtype, shape=shape)
+
+    @staticmethod
+    def open_shared_array(file_path):
+        return np.load(file_path, mmap_mode='r+')
+
+    @staticmethod
+    def remove_shared_array(file_path):
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+
+    def shutdown(self):
+        with self.lock:
+            if self.pool is not None:
+                self.pool.terminate()
+                self.pool.join()
+                self.pool = None
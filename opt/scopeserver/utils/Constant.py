@@ -3,6 +3,45 @@ _MOUSE_EVENTS_THRESHOLD = 1
 _LOWER_LIMIT_RGB = 0
 _UPPER_LIMIT_RGB = 225
 _NO_EXPR_RGB = 166
+_SPECIES_SKETCH_SIZE = 1000
+_STATISTICS_BATCH_SIZE = 64
+_FEATURES_STREAM_IDLE_TIMEOUT = 10
+_SEARCH_CANCEL_CHECK_INTERVAL = 4096
+_QUANTILE_SKETCH_SIZE = 100
+_QUANTILE_SKETCH_MAX_ANNOTATION_VALUES = 64
+_QUANTILE_SKETCH_MAX_GROUPS = 256
+_QUANTILE_SKETCH_MAX_MEMORY = 1024 ** 3
+_VMAX_MAX_WORKERS = 8
+_COMPUTE_BACKEND_PROCESSES = 8
+_ASYNC_IO_MAX_WORKERS = 32
+_ASYNC_COMPUTE_MAX_WORKERS = 4
+_LOG_BATCH_SIZE = 1000
+_REAPER_DELETE_INTERVAL = 1
+_REAPER_RESCAN_INTERVAL = 60 * 10
+_SUB_LOOM_CACHE_SIZE = 10 * 1024 ** 3
+_DOWNLOAD_CHUNK_SIZE = 1024 ** 2
+_SUB_LOOM_MAX_MEMORY_SIZE = 512 * 1024 ** 2
+_MATRIX_READ_BAND_SIZE = 256 * 1024 ** 2
+_UPLOAD_CHUNK_SIZE = 1024 ** 2
+_UPLOAD_MAX_FIELD_SIZE = 64 * 1024
+_AUCELL_BLOCK_SIZE = 256
+_AUCELL_SCORE_BLOCKS = 16
+_AUCELL_RANKINGS_SEED = 0
+_AUCELL_AUC_THRESHOLD = 0.05
+_AUCELL_RANKINGS_PROGRESS_SHARE = 0.9
+_LOOM_PREPARATION_MAX_WORKERS = 1
+_LOOM_PREPARATION_RANKINGS = False
+_LOOM_PREPARATION_POLL_INTERVAL = 1
+_LOOM_PREPARATION_OPTIMIZE = False
+_LOOM_OPTIMIZER_CHUNK_GENES = 16
+_LOOM_OPTIMIZER_CHUNK_SIZE = 256 * 1024
+_LOOM_OPTIMIZER_ATTR_CHUNK_SIZE = 1024 ** 2
+_LOOM_OPTIMIZER_COPY_SIZE = 256 * 1024 ** 2
+_LOOM_OPTIMIZER_COMPRESSION = 'gzip'
+_LOOM_OPTIMIZER_COMPRESSION_LEVEL = 2
+_LOOM_OPTIMIZER_BENCHMARK_GENES = 32
+_ENRICHMENT_CACHE_MEMORY_SIZE = 256 * 1024 ** 2
+_ENRICHMENT_CACHE_DISK_SIZE = 2 * 1024 ** 3
 
 BIG_COLOR_LIST = ["ff0000", "ffc480", "149900", "307cbf", "d580ff", "cc0000", "bf9360", "1d331a", "79baf2", "deb6f2",
                   "990000", "7f6240", "283326", "2d4459", "8f00b3", "4c0000", "ccb499", "00f220", "accbe6", "520066",
@@ -6,6 +6,13 @@ import pickle
 from pathlib import Path
 
 from scopeserver.dataserver.modules.gserver import GServer as gs
+from scopeserver.utils import GeneMappings as gm
+from scopeserver.utils import SessionStore as ss
+from scopeserver.utils import LogWriter as lw
+from scopeserver.utils import SessionReaper as sr
+from scopeserver.utils import ActiveSessionTracker as ast
+from scopeserver.utils import SharedActiveSessionTracker as sast
+from scopeserver.utils import Constant
 
 app_name = 'SCope'
 app_author = 'Aertslab'
@@ -22,6 +29,8 @@ data_dirs = {"Loom": {"path": os.path.join(platform_dirs.user_data_dir, "my-loom
                          "message": "No gene-sets folder detected. Making gene-sets data folder in current directory: {0}.".format(str(os.path.join(platform_dirs.user_data_dir, "my-gene-sets")))},
              "LoomAUCellRankings": {"path": os.path.join(platform_dirs.user_data_dir, "my-aucell-rankings"),
                                     "message": "No AUCell rankings folder detected. Making AUCell rankings data folder in current directory: {0}.".format(str(os.path.join(platform_dirs.user_data_dir, "my-aucell-rankings")))},
+             "LoomStatistics": {"path": os.path.join(platform_dirs.user_data_dir, "my-loom-statistics"),
+                                "message": "No loom statistics folder detected. Making loom statistics data folder: {0}.".format(str(os.path.join(platform_dirs.user_data_dir, "my-loom-statistics")))},
              "Config": {"path": os.path.join(platform_dirs.user_config_dir),
                         "message": "No Config folder detected. Making Config folder: {0}.".format(str(os.path.join(platform_dirs.user_config_dir)))},
              "Logs": {"path": os.path.join(platform_dirs.user_log_dir),
@@ -31,11 +40,15 @@ class DataFileHandler():
 
     data_dirs = data_dirs
 
-    def __init__(self, dev_env):
+    def __init__(self, dev_env, worker_id=None):
         self.dev_env = dev_env
-        self.current_UUIDs = {}
+        # Server worker (supervisor mode): the state is shared with the other workers
+        self.worker_id = worker_id
+        self.current_UUIDs = None
         self.permanent_UUIDs = set()
-        self.active_sessions = {}
+        self.permanent_UUIDs_mtime = None
+        self.session_reaper = None
+        self.active_sessions = ast.ActiveSessionTracker(timeout=_SESSION_TIMEOUT, limit=Constant._ACTIVE_SESSIONS_LIMIT)
         self.uuid_log = None
         self.data_dirs =  data_dirs
         self.gene_sets_dir = DataFileHandler.get_data_dir_path_by_file_type(file_type="GeneSet")
@@ -86,53 +99,72 @@ class DataFileHandler():
         return self.permanent_UUIDs
 
     def read_UUID_db(self):
+        self.current_UUIDs = ss.SessionStore(file_path=os.path.join(self.config_dir, 'Sessions.db'))
+        # Import the UUIDs of the previous storage format
         if os.path.isfile(os.path.join(self.config_dir, 'UUID_Timeouts.tsv')):
-            with open(os.path.join(self.config_dir, 'UUID_Timeouts.tsv'), 'r') as fh:
-                for line in fh.readlines():
-                    ls = line.rstrip('\n').split('\t')
-                    self.current_UUIDs[ls[0]] = float(ls[1])
-        if os.path.isfile(os.path.join(self.config_dir, 'Permanent_Session_IDs.txt')):
-            with open(os.path.join(self.config_dir, 'Permanent_Session_IDs.txt'), 'r') as fh:
-                for line in fh.readlines():
-                    self.permanent_UUIDs.add(line.rstrip('\n'))
-                    self.current_UUIDs[line.rstrip('\n')] = time.time() + (_ONE_DAY_IN_SECONDS * 365)
-        else:
+            try:
+                self.current_UUIDs.import_tsv(file_path=os.path.join(self.config_dir, 'UUID_Timeouts.tsv'))
+            except FileNotFoundError:
+                # Imported by another server process
+                pass
+        if not os.path.isfile(os.path.join(self.config_dir, 'Permanent_Session_IDs.txt')):
             with open(os.path.join(self.config_dir, 'Permanent_Session_IDs.txt'), 'w') as fh:
                 newUUID = 'SCopeApp__{0}'.format(str(uuid.uuid4()))
                 fh.write('{0}\n'.format(newUUID))
-                self.current_UUIDs[newUUID] = time.time() + (_ONE_DAY_IN_SECONDS * 365)
+        self.read_permanent_UUIDs()
+        if self.worker_id is not None:
+            self.active_sessions = sast.SharedActiveSessionTracker(store=self.current_UUIDs, timeout=_SESSION_TIMEOUT, limit=Constant._ACTIVE_SESSIONS_LIMIT)
+        self.session_reaper = sr.SessionReaper(sessions=self.current_UUIDs,
+                                               timeout=_UUID_TIMEOUT,
+                                               data_dir_paths=[DataFileHandler.get_data_dir_path_by_file_type(file_type=file_type) for file_type in ['Loom', 'GeneSet', 'LoomAUCellRankings']],
+                                               permanent_UUIDs=self.permanent_UUIDs,
+                                               on_expire=self.active_sessions.remove,
+                                               get_metrics=self.active_sessions.get_metrics)
+        self.session_reaper.start()
+
+    def get_session_reaper(self):
+        return self.session_reaper
+
+    def add_UUID(self, UUID):
+        start = time.time()
+        self.current_UUIDs[UUID] = start
+        self.session_reaper.schedule(UUID=UUID, start=start)
+
+    def read_permanent_UUIDs(self):
+        permanent_UUIDs_file_path = os.path.join(self.config_dir, 'Permanent_Session_IDs.txt')
+        if not os.path.isfile(permanent_UUIDs_file_path):
+            return
+        mtime = os.path.getmtime(permanent_UUIDs_file_path)
+        if mtime == self.permanent_UUIDs_mtime:
+            return
+        with open(permanent_UUIDs_file_path, 'r') as fh:
+            permanent_UUIDs = set(line.rstrip('\n') for line in fh.readlines() if line.rstrip('\n') != '')
+        self.current_UUIDs.update_many(UUIDs={UUID: time.time() + (_ONE_DAY_IN_SECONDS * 365) for UUID in permanent_UUIDs}, permanent=True)
+        self.permanent_UUIDs.update(permanent_UUIDs)
+        self.permanent_UUIDs_mtime = mtime
 
     def update_UUID_db(self):
-        with open(os.path.join(self.config_dir, 'UUID_Timeouts.tsv'), 'w') as fh:
-            for UUID in self.current_UUIDs.keys():
-                if UUID not in self.permanent_UUIDs:
-                    fh.write('{0}\t{1}\n'.format(UUID, self.current_UUIDs[UUID]))
-        if os.path.isfile(os.path.join(self.config_dir, 'Permanent_Session_IDs.txt')):
-            with open(os.path.join(self.config_dir, 'Permanent_Session_IDs.txt'), 'r') as fh:
-                for line in fh.readlines():
-                    self.permanent_UUIDs.add(line.rstrip('\n'))
-                    self.current_UUIDs[line.rstrip('\n')] = time.time() + (_ONE_DAY_IN_SECONDS * 365)
-    
+        # The UUIDs are stored as they change, only pick up the permanent session IDs added to the file
+        self.read_permanent_UUIDs()
+
     def get_uuid_log(self):
         return self.uuid_log
 
     def create_uuid_log(self):
-        self.uuid_log = open(os.path.join(self.logs_dir, 'UUID_Log_{0}'.format(time.strftime('%Y-%m-%d__%H-%M-%S', time.localtime()))), 'w')
-    
+        uuid_log_file_name = 'UUID_Log_{0}'.format(time.strftime('%Y-%m-%d__%H-%M-%S', time.localtime()))
+        if self.worker_id is not None:
+            uuid_log_file_name += '__worker{0}'.format(self.worker_id)
+        self.uuid_log = lw.LogWriter(file_path=os.path.join(self.logs_dir, uuid_log_file_name))
+
     def get_active_sessions(self):
         return self.active_sessions
 
-    def active_session_check(self):
-        curTime = time.time()
-        for UUID in list(self.active_sessions.keys()):
-            if curTime - self.active_sessions[UUID] > _SESSION_TIMEOUT or UUID not in self.get_current_UUIDs():
-                del(self.active_sessions[UUID])
-    
-    def reset_active_session_timeout(self, UUID):
-        self.active_sessions[UUID] = time.time()
+    def admit_session(self, UUID, active):
+        return self.active_sessions.admit(UUID=UUID, active=active, permanent=UUID in self.permanent_UUIDs)
 
     def load_gene_mappings(self):
         gene_mappings_dir_path = os.path.join(Path(__file__).parents[1], 'dataserver', 'data', 'gene_mappings') if self.dev_env else os.path.join(Path(__file__).parents[4], 'data', 'gene_mappings')
-        DataFileHandler.dmel_mappings = pickle.load(open(os.path.join(gene_mappings_dir_path, 'terminal_mappings.pickle'), 'rb'))
-        DataFileHandler.hsap_to_dmel_mappings = pickle.load(open(os.path.join(gene_mappings_dir_path, 'hsap_to_dmel_mappings.pickle'), 'rb'))
-        DataFileHandler.mmus_to_dmel_mappings = pickle.load(open(os.path.join(gene_mappings_dir_path, 'mmus_to_dmel_mappings.pickle'), 'rb'))
\ No newline at end of file
+        # Memory-mapped (converted from the pickles on first use): loaded instantly and shared between processes
+        DataFileHandler.dmel_mappings = gm.load(os.path.join(gene_mappings_dir_path, 'terminal_mappings.pickle'))
+        DataFileHandler.hsap_to_dmel_mappings = gm.load(os.path.join(gene_mappings_dir_path, 'hsap_to_dmel_mappings.pickle'))
+        DataFileHandler.mmus_to_dmel_mappings = gm.load(os.path.join(gene_mappings_dir_path, 'mmus_to_dmel_mappings.pickle'))
\ No newline at end of file
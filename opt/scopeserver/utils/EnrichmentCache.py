@@ -0,0 +1,112 @@
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+
+
+class EnrichmentCache():
+
+    '''
+    EnrichmentCache class caches the enrichment values (e.g.: AUCs) of the cells of a loom for a gene set. Entries are
+    keyed by the partial md5 hash of the loom, the hash of the content of the gene set, the method and its parameters.
+
+    The most recently used entries are kept in memory (up to max_memory_size bytes). Every entry is spilled to the
+    disk (up to max_disk_size bytes, least recently used removed first) from where it is reloaded once evicted from
+    memory.
+    '''
+
+    def __init__(self, dir_path, max_memory_size, max_disk_size):
+        self.dir_path = dir_path
+        self.max_memory_size = max_memory_size
+        self.max_disk_size = max_disk_size
+        self.entries = OrderedDict()
+        self.memory_size = 0
+        self.lock = threading.Lock()
+        if not os.path.isdir(dir_path):
+            os.makedirs(dir_path, exist_ok=True)
+
+    @staticmethod
+    def get_gene_set_hash(file_path):
+        h = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for data in iter(lambda: f.read(1024 ** 2), b''):
+                h.update(data)
+        return h.hexdigest()
+
+    @staticmethod
+    def get_key(partial_md5_hash, gene_set_hash, method, params):
+        h = hashlib.sha1()
+        h.update(partial_md5_hash.encode('utf-8'))
+        h.update(gene_set_hash.encode('utf-8'))
+        h.update(method.encode('utf-8'))
+        h.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+        return h.hexdigest()
+
+    def get_file_path(self, key):
+        return os.path.join(self.dir_path, "{0}.npy".format(key))
+
+    def get(self, key):
+        """Get the cached values of the given key or None if missing."""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        file_path = self.get_file_path(key=key)
+        try:
+            values = np.load(file_path)
+            os.utime(file_path)
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        self.set(key=key, values=values, spilled=True)
+        return values
+
+    def set(self, key, values, spilled=False):
+        # Copy: the values can be a view of a larger array (e.g.: a row of a batch)
+        values = np.array(values)
+        values.flags.writeable = False
+        with self.lock:
+            if key in self.entries:
+                self.memory_size -= self.entries.pop(key).nbytes
+            self.entries[key] = values
+            self.memory_size += values.nbytes
+            # The evicted entries are already spilled to the disk
+            while self.memory_size > self.max_memory_size and len(self.entries) > 1:
+                self.memory_size -= self.entries.popitem(last=False)[1].nbytes
+        if not spilled:
+            # Spilled right away: the entry outlives the memory eviction and the restarts of the server
+            self.spill(key=key, values=values)
+            self.enforce_disk_budget()
+
+    def spill(self, key, values):
+        file_path = self.get_file_path(key=key)
+        if os.path.exists(file_path):
+            return
+        tmp_file_path = file_path + '.tmp{0}_{1}'.format(os.getpid(), threading.get_ident())
+        try:
+            with open(tmp_file_path, 'wb') as f:
+                np.save(f, values)
+            os.replace(tmp_file_path, file_path)
+        except OSError as e:
+            print("Could not spill the enrichment {0}: {1}".format(key, e))
+            if os.path.exists(tmp_file_path):
+                os.remove(tmp_file_path)
+
+    def enforce_disk_budget(self):
+        with self.lock:
+            files = []
+            for entry in os.scandir(self.dir_path):
+                # Skip the entries being written
+                if entry.is_file() and entry.name.endswith('.npy'):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+            total_size = sum(size for _, size, _ in files)
+            for _, size, file_path in sorted(files):
+                if total_size <= self.max_disk_size:
+                    break
+                try:
+                    os.remove(file_path)
+                    total_size -= size
+                except OSError as e:
+                    print("Could not remove {0}: {1}".format(file_path, e))
@@ -0,0 +1,366 @@
+import os
+import time
+import threading
+import h5py
+import numpy as np
+
+from scopeserver.utils import DataFileHandler as dfh
+from scopeserver.utils import Constant
+from scopeserver.utils import QuantileSketch as qs
+
+# Columns of the statistics arrays
+_STATISTICS = ['max', 'p99', 'mean', 'nonzero']
+# Log / CPM transform combinations the gene expression and metric statistics are computed for
+_TRANSFORMS = [(False, False), (True, False), (False, True), (True, True)]
+# The log transform is monotonic: the quantile sketches are only stored without it
+_SKETCH_TRANSFORMS = [False, True]
+_SKETCH = 'sketch'
+# Group of all the cells of the loom: merged over several looms
+_ALL_CELLS = ('', '')
+
+
+def get_transform_key(log_transform, cpm_normalise):
+    return 'log{0:d}_cpm{1:d}'.format(bool(log_transform), bool(cpm_normalise))
+
+
+def compute_statistics(vals):
+    """Compute the statistics of each row of the given 2D array.
+
+    Returns:
+        ndarray: Array of shape (n_rows, len(_STATISTICS)).
+
+    """
+    vals = np.atleast_2d(vals)
+    stats = np.zeros((vals.shape[0], len(_STATISTICS)))
+    if vals.shape[1] == 0:
+        return stats
+    stats[:, 0] = vals.max(axis=1)
+    stats[:, 1] = np.percentile(vals, 99, axis=1)
+    stats[:, 2] = vals.mean(axis=1)
+    stats[:, 3] = np.count_nonzero(vals, axis=1)
+    return stats
+
+
+def get_sketch_key(cpm_normalise):
+    return 'cpm{0:d}'.format(bool(cpm_normalise))
+
+
+def transform(vals, log_transform, cpm_normalise, nUMI):
+    # Same transforms as Loom.get_gene_expression and Loom.get_metric
+    if cpm_normalise:
+        vals = vals / nUMI
+    if log_transform:
+        vals = np.log2(vals + 1)
+    return vals
+
+
+class FeatureStatistics():
+
+    '''
+    FeatureStatistics class manages the statistics sidecar of a .loom: max, 99th percentile, mean and number of
+    non-zero values of every gene, regulon and metric (under each log/CPM transform combination).
+
+    It also stores a quantile sketch of every feature for all the cells and for each annotation value (and cluster) of
+    the loom, so that the vmax of the cells of several annotation values (or of several looms) is computed by merging
+    their sketches. The annotations sketched are limited in number of groups and memory (whole annotations only).
+
+    The sidecar is computed in a background chunked pass over the expression matrix and stored in the LoomStatistics
+    folder, keyed by the partial md5 hash of the loom. Once available, the vmax of a feature is a lookup.
+    '''
+
+    _computing = set()
+    _computing_lock = threading.Lock()
+
+    def __init__(self, loom):
+        self.loom = loom
+        self.file_path = os.path.join(dfh.DataFileHandler.get_data_dir_path_by_file_type(file_type="LoomStatistics"), "{0}.statistics.h5".format(loom.partial_md5_hash))
+        self.statistics = None
+        self.sketch_groups = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_vmax_from_statistics(p99, max_v_max):
+        # Same rules as SCope.get_vmax
+        vmax = p99
+        if vmax == 0 and max_v_max != 0:
+            vmax = max_v_max
+        if vmax == 0:
+            vmax = 0.01
+        return vmax, max_v_max
+
+    def get_file_path(self):
+        return self.file_path
+
+    def is_available(self):
+        return self.statistics is not None or os.path.exists(self.file_path)
+
+    def is_computing(self):
+        return self.loom.partial_md5_hash in FeatureStatistics._computing
+
+    def load(self):
+        with self.lock:
+            if self.statistics is not None:
+                return self.statistics
+            statistics = {}
+            with h5py.File(self.file_path, 'r') as f:
+                for feature_type in f.keys():
+                    if feature_type == _SKETCH:
+                        continue
+                    names = [x.decode('utf-8') if isinstance(x, bytes) else str(x) for x in f[feature_type]['names'][:]]
+                    index = {name: i for i, name in enumerate(names)}
+                    for key in f[feature_type].keys():
+                        if key != 'names':
+                            statistics[(feature_type, key)] = (index, f[feature_type][key][:])
+            self.statistics = statistics
+            return self.statistics
+
+    def get(self, feature_type, feature, log_transform=False, cpm_normalise=False):
+        """Get the statistics of the given feature.
+
+        Returns:
+            dict: The statistics of the feature (max, p99, mean, nonzero) or None if not (yet) available.
+
+        """
+        if not self.is_available():
+            return None
+        if feature_type == 'regulon':
+            key = 'none'
+        else:
+            key = get_transform_key(log_transform=log_transform, cpm_normalise=cpm_normalise)
+        try:
+            index, stats = self.load()[(feature_type, key)]
+        except (KeyError, OSError):
+            return None
+        row = self.get_index(feature_type=feature_type, feature=feature)
+        if row is None:
+            return None
+        return dict(zip(_STATISTICS, stats[row]))
+
+    def get_index(self, feature_type, feature):
+        try:
+            index = next(index for (t, key), (index, stats) in self.load().items() if t == feature_type)
+        except (StopIteration, OSError):
+            return None
+        if feature_type == 'gene' and feature not in index:
+            # Synonym of the gene symbol used in the loom
+            feature = self.loom.get_gene_names().get(feature, feature)
+        return index.get(feature)
+
+    def load_sketch_groups(self):
+        with self.lock:
+            if self.sketch_groups is None:
+                with h5py.File(self.file_path, 'r') as f:
+                    if _SKETCH not in f:
+                        self.sketch_groups = {}
+                    else:
+                        names = [x.decode('utf-8') if isinstance(x, bytes) else str(x) for x in f[_SKETCH]['groups'][:]]
+                        sizes = f[_SKETCH]['sizes'][:]
+                        self.sketch_groups = {tuple(name.split('\t', 1)): (i, int(sizes[i])) for i, name in enumerate(names)}
+            return self.sketch_groups
+
+    def get_sketch(self, feature_type, feature, groups, cpm_normalise=False):
+        """Get the quantile sketch of the given feature over the cells of the given (disjoint) groups.
+
+        Args:
+            groups (list): (annotation name, annotation value) tuples, clusters are named Clustering_<id>.
+
+        Returns:
+            QuantileSketch: The merged sketch or None if a sketch is not (yet) available.
+
+        """
+        if not self.is_available():
+            return None
+        try:
+            sketch_groups = self.load_sketch_groups()
+        except OSError:
+            return None
+        if any(group not in sketch_groups for group in groups):
+            return None
+        row = self.get_index(feature_type=feature_type, feature=feature)
+        if row is None:
+            return None
+        key = 'none' if feature_type == 'regulon' else get_sketch_key(cpm_normalise=cpm_normalise)
+        group_indices = sorted(set(sketch_groups[group][0] for group in groups))
+        group_sizes = {i: size for i, size in sketch_groups.values()}
+        with h5py.File(self.file_path, 'r') as f:
+            g = f[_SKETCH][feature_type]
+            nonzero = g[key + '_nonzero'][row, group_indices]
+            max_values = g[key + '_max'][row, group_indices]
+            means = g[key + '_means'][row, group_indices, :]
+        return qs.QuantileSketch.merge(qs.QuantileSketch.from_stored(n_values=group_sizes[i], nonzero=nonzero[j], max_value=max_values[j], means=means[j])
+                                       for j, i in enumerate(group_indices))
+
+    def get_loom_sketch(self, feature_type, feature, cpm_normalise=False):
+        return self.get_sketch(feature_type=feature_type, feature=feature, groups=[_ALL_CELLS], cpm_normalise=cpm_normalise)
+
+    @staticmethod
+    def get_vmax_from_sketch(sketch, feature_type, log_transform=False):
+        p99, max_v_max = sketch.get_percentile(99), sketch.get_max()
+        if log_transform and feature_type != 'regulon':
+            p99, max_v_max = np.log2(p99 + 1), np.log2(max_v_max + 1)
+        return FeatureStatistics.get_vmax_from_statistics(p99=p99, max_v_max=max_v_max)
+
+    def get_annotation_vmax(self, feature_type, feature, annotation, logic='OR', log_transform=False, cpm_normalise=False):
+        groups = set((anno.name, str(value)) for anno in annotation for value in anno.values)
+        # Sketches can only be merged over disjoint sets of cells: values of a same annotation (OR)
+        if len(groups) == 0 or (len(groups) > 1 and (logic == 'AND' or len(set(name for name, value in groups)) > 1)):
+            return None
+        sketch = self.get_sketch(feature_type=feature_type, feature=feature, groups=list(groups), cpm_normalise=cpm_normalise)
+        if sketch is None:
+            return None
+        return FeatureStatistics.get_vmax_from_sketch(sketch=sketch, feature_type=feature_type, log_transform=log_transform)
+
+    def get_vmax(self, feature_type, feature, log_transform=False, cpm_normalise=False, annotation=None, logic='OR'):
+        """Get the vmax and max vmax of the given feature, over the cells of the given annotation values if any.
+
+        Returns:
+            tuple: (vmax, max_vmax) or None if the statistics are not (yet) available.
+
+        """
+        if annotation is not None and len(annotation) > 0:
+            return self.get_annotation_vmax(feature_type=feature_type, feature=feature, annotation=annotation, logic=logic, log_transform=log_transform, cpm_normalise=cpm_normalise)
+        stats = self.get(feature_type=feature_type, feature=feature, log_transform=log_transform, cpm_normalise=cpm_normalise)
+        if stats is None:
+            return None
+        return FeatureStatistics.get_vmax_from_statistics(p99=stats['p99'], max_v_max=stats['max'])
+
+    def compute_async(self):
+        with FeatureStatistics._computing_lock:
+            if self.is_available() or self.is_computing():
+                return
+            FeatureStatistics._computing.add(self.loom.partial_md5_hash)
+        threading.Thread(target=self.compute, daemon=True).start()
+
+    def compute(self):
+        start_time = time.time()
+        try:
+            statistics, groups, sketches = self.compute_statistics()
+            self.write(statistics=statistics, groups=groups, sketches=sketches)
+            print("Debug: %s seconds elapsed (computing statistics of {0}) ---".format(self.loom.get_file_path()) % (time.time() - start_time))
+        except Exception as e:
+            print("Could not compute the statistics of {0}: {1}".format(self.loom.get_file_path(), e))
+        finally:
+            with FeatureStatistics._computing_lock:
+                FeatureStatistics._computing.discard(self.loom.partial_md5_hash)
+
+    @staticmethod
+    def get_max_groups(n_genes):
+        # The gene sketches (one per sketch transform) take most of the memory
+        group_size = max(n_genes, 1) * len(_SKETCH_TRANSFORMS) * (Constant._QUANTILE_SKETCH_SIZE + 2) * 4
+        return min(Constant._QUANTILE_SKETCH_MAX_GROUPS, Constant._QUANTILE_SKETCH_MAX_MEMORY // group_size)
+
+    def get_groups(self, n_genes):
+        """Get the cells of the loom (all cells) and of each annotation value and cluster of the loom, as long as the
+        number of groups and the memory of their sketches are within limits.
+
+        Returns:
+            list: ((annotation name, annotation value), cell indices) tuples.
+
+        """
+        groups = [(_ALL_CELLS, np.arange(self.loom.get_connection().shape[1]))]
+        max_groups = FeatureStatistics.get_max_groups(n_genes=n_genes)
+        meta_data = self.loom.get_meta_data() if self.loom.has_meta_data() else {}
+        for annotation in meta_data.get('annotations', []):
+            if not self.loom.has_ca_attr(name=annotation['name']) or len(annotation['values']) > Constant._QUANTILE_SKETCH_MAX_ANNOTATION_VALUES:
+                continue
+            if len(groups) + len(annotation['values']) > max_groups:
+                continue
+            values = self.loom.get_ca_attr_by_name(name=annotation['name']).astype(str)
+            for value in annotation['values']:
+                groups.append(((annotation['name'], str(value)), np.where(values == str(value))[0]))
+        for clustering in meta_data.get('clusterings', []):
+            if len(clustering['clusters']) > Constant._QUANTILE_SKETCH_MAX_ANNOTATION_VALUES:
+                continue
+            if len(groups) + len(clustering['clusters']) > max_groups:
+                continue
+            clusters = self.loom.get_clustering_by_id(clustering_id=clustering['id'])
+            for cluster in clustering['clusters']:
+                groups.append((("Clustering_{0}".format(clustering['id']), str(cluster['id'])), np.where(clusters == cluster['id'])[0]))
+        return groups
+
+    @staticmethod
+    def compute_sketches(vals, groups, sketches, start):
+        for i, (group, cell_indices) in enumerate(groups):
+            nonzero, max_values, means = qs.build_sketches(vals=vals[:, cell_indices], size=Constant._QUANTILE_SKETCH_SIZE)
+            end = start + vals.shape[0]
+            sketches[0][start:end, i] = nonzero
+            sketches[1][start:end, i] = max_values
+            sketches[2][start:end, i] = means
+
+    @staticmethod
+    def new_sketches(n_features, n_groups):
+        return (np.zeros((n_features, n_groups), dtype=np.int32),
+                np.zeros((n_features, n_groups), dtype=np.float32),
+                np.zeros((n_features, n_groups, Constant._QUANTILE_SKETCH_SIZE), dtype=np.float32))
+
+    def compute_statistics(self):
+        loom_connection = self.loom.get_connection()
+        n_genes = loom_connection.shape[0]
+        nUMI = self.loom.get_nUMI()
+        groups = self.get_groups(n_genes=n_genes)
+        statistics = {}
+        sketches = {}
+
+        # Genes: chunked over the rows of the matrix, memory is bounded by the batch size
+        gene_stats = {get_transform_key(*t): np.zeros((n_genes, len(_STATISTICS))) for t in _TRANSFORMS}
+        gene_sketches = {get_sketch_key(cpm_normalise): FeatureStatistics.new_sketches(n_features=n_genes, n_groups=len(groups)) for cpm_normalise in _SKETCH_TRANSFORMS}
+        for start in range(0, n_genes, Constant._STATISTICS_BATCH_SIZE):
+            end = min(start + Constant._STATISTICS_BATCH_SIZE, n_genes)
+            vals = loom_connection[start:end, :].astype(np.float64)
+            for log_transform, cpm_normalise in _TRANSFORMS:
+                t_vals = transform(vals=vals, log_transform=log_transform, cpm_normalise=cpm_normalise, nUMI=nUMI)
+                gene_stats[get_transform_key(log_transform, cpm_normalise)][start:end] = compute_statistics(vals=t_vals)
+                if not log_transform:
+                    FeatureStatistics.compute_sketches(vals=t_vals, groups=groups, sketches=gene_sketches[get_sketch_key(cpm_normalise)], start=start)
+        statistics['gene'] = (list(self.loom.get_genes()), gene_stats)
+        sketches['gene'] = gene_sketches
+
+        # Regulons: AUC values are not transformed
+        if self.loom.has_regulons_AUC():
+            regulons_auc = self.loom.get_regulons_AUC()
+            regulons = list(regulons_auc.dtype.names)
+            vals = np.array([regulons_auc[regulon] for regulon in regulons], dtype=np.float64)
+            statistics['regulon'] = (regulons, {'none': compute_statistics(vals=vals)})
+            sketches['regulon'] = {'none': FeatureStatistics.new_sketches(n_features=len(regulons), n_groups=len(groups))}
+            FeatureStatistics.compute_sketches(vals=vals, groups=groups, sketches=sketches['regulon']['none'], start=0)
+
+        # Metrics
+        if self.loom.has_md_metrics():
+            metrics = [metric['name'] for metric in self.loom.get_meta_data()['metrics'] if self.loom.has_ca_attr(name=metric['name'])]
+            if len(metrics) > 0:
+                vals = np.array([self.loom.get_ca_attr_by_name(name=metric) for metric in metrics], dtype=np.float64)
+                metric_stats = {}
+                sketches['metric'] = {}
+                for log_transform, cpm_normalise in _TRANSFORMS:
+                    t_vals = transform(vals=vals, log_transform=log_transform, cpm_normalise=cpm_normalise, nUMI=nUMI)
+                    metric_stats[get_transform_key(log_transform, cpm_normalise)] = compute_statistics(vals=t_vals)
+                    if not log_transform:
+                        sketches['metric'][get_sketch_key(cpm_normalise)] = FeatureStatistics.new_sketches(n_features=len(metrics), n_groups=len(groups))
+                        FeatureStatistics.compute_sketches(vals=t_vals, groups=groups, sketches=sketches['metric'][get_sketch_key(cpm_normalise)], start=0)
+                statistics['metric'] = (metrics, metric_stats)
+        return statistics, groups, sketches
+
+    def write(self, statistics, groups, sketches):
+        tmp_file_path = self.file_path + '.tmp{0}'.format(os.getpid())
+        with h5py.File(tmp_file_path, 'w') as f:
+            for feature_type, (names, stats) in statistics.items():
+                g = f.create_group(feature_type)
+                g.create_dataset('names', data=np.array([str(x).encode('utf-8') for x in names]))
+                for key, vals in stats.items():
+                    g.create_dataset(key, data=vals)
+            FeatureStatistics.write_sketches(f=f, groups=groups, sketches=sketches)
+        os.replace(tmp_file_path, self.file_path)
+
+    @staticmethod
+    def write_sketches(f, groups, sketches):
+        if len(groups) == 0:
+            return
+        g = f.create_group(_SKETCH)
+        g.create_dataset('groups', data=np.array(['\t'.join(group).encode('utf-8') for group, cell_indices in groups], dtype=bytes))
+        g.create_dataset('sizes', data=np.array([len(cell_indices) for group, cell_indices in groups], dtype=np.int64))
+        for feature_type, feature_sketches in sketches.items():
+            ft = g.create_group(feature_type)
+            for key, (nonzero, max_values, means) in feature_sketches.items():
+                ft.create_dataset(key + '_nonzero', data=nonzero, compression='gzip')
+                ft.create_dataset(key + '_max', data=max_values, compression='gzip')
+                ft.create_dataset(key + '_means', data=means, compression='gzip')
@@ -0,0 +1,220 @@
+import os
+import sys
+import mmap
+import zlib
+import struct
+import pickle
+import argparse
+import numpy as np
+from collections.abc import Mapping, ItemsView
+
+_MAGIC = b'SCOPEGM1'
+# magic, kind, n_strings, n_keys, n_slots, n_entries, offsets of: string offsets, string data, keys, hash table, values, entries (genes), entries (identities)
+_HEADER = struct.Struct('<8s12Q')
+
+# Kind of values stored in the mappings
+_STRING = 0  # gene -> gene (e.g.: terminal_mappings)
+_ORTHOLOGUES = 1  # gene -> [(gene, %identity), ...] (e.g.: hsap_to_dmel_mappings)
+
+_EXTENSION = '.gmap'
+
+
+def _hash(b):
+    return zlib.crc32(b) & 0xffffffff
+
+
+def _align(fh):
+    fh.write(b'\0' * (-fh.tell() % 8))
+    return fh.tell()
+
+
+class GeneMappings(Mapping):
+
+    '''
+    GeneMappings class is a read-only dict-like view on a compact, memory-mapped gene mappings file (.gmap).
+
+    All the strings (keys and values) are stored once in a sorted string table addressed by offsets, keys are
+    found through an open addressing hash table. Nothing is unpickled, the file is only paged in when accessed
+    and shared by all the processes mapping it through the page cache.
+    '''
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, 'rb') as fh:
+            self.mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        header = _HEADER.unpack_from(self.mm, 0)
+        if header[0] != _MAGIC:
+            raise ValueError('The file located at {0} is not a gene mappings file.'.format(file_path))
+        self.kind, n_strings, self.n_keys, n_slots, n_entries = header[1:6]
+        off_str_offsets, self.off_str_data, off_keys, off_table, off_values, off_entry_genes, off_entry_identities = header[6:]
+        self.mask = n_slots - 1
+        view = memoryview(self.mm)
+        self.str_offsets = view[off_str_offsets:off_str_offsets + (n_strings + 1) * 8].cast('Q')
+        self.keys_ = view[off_keys:off_keys + self.n_keys * 4].cast('I')
+        self.table = view[off_table:off_table + n_slots * 4].cast('I')
+        if self.kind == _STRING:
+            self.values_ = view[off_values:off_values + self.n_keys * 4].cast('I')
+        else:
+            self.values_ = view[off_values:off_values + (self.n_keys + 1) * 8].cast('Q')
+            self.entry_genes = view[off_entry_genes:off_entry_genes + n_entries * 4].cast('I')
+            self.entry_identities = view[off_entry_identities:off_entry_identities + n_entries * 8].cast('d')
+
+    def _string_bytes(self, string_id):
+        start = self.off_str_data + self.str_offsets[string_id]
+        end = self.off_str_data + self.str_offsets[string_id + 1]
+        return self.mm[start:end]
+
+    def _string(self, string_id):
+        return self._string_bytes(string_id=string_id).decode('utf-8')
+
+    def _find(self, key):
+        if not isinstance(key, str):
+            return -1
+        b = key.encode('utf-8')
+        h = _hash(b) & self.mask
+        while True:
+            slot = self.table[h]
+            if slot == 0:
+                return -1
+            if self._string_bytes(string_id=self.keys_[slot - 1]) == b:
+                return slot - 1
+            h = (h + 1) & self.mask
+
+    def _value(self, idx):
+        if self.kind == _STRING:
+            return self._string(string_id=self.values_[idx])
+        return [(self._string(string_id=self.entry_genes[i]), self.entry_identities[i]) for i in range(self.values_[idx], self.values_[idx + 1])]
+
+    def __getitem__(self, key):
+        idx = self._find(key=key)
+        if idx < 0:
+            raise KeyError(key)
+        return self._value(idx=idx)
+
+    def __contains__(self, key):
+        return self._find(key=key) >= 0
+
+    def __iter__(self):
+        for idx in range(self.n_keys):
+            yield self._string(string_id=self.keys_[idx])
+
+    def __len__(self):
+        return self.n_keys
+
+    def items(self):
+        return _GeneMappingsItemsView(self)
+
+    def iter_items(self):
+        # Avoid the hash lookups of the default Mapping.items()
+        for idx in range(self.n_keys):
+            yield self._string(string_id=self.keys_[idx]), self._value(idx=idx)
+
+    @staticmethod
+    def get_file_path(pickle_file_path):
+        return os.path.splitext(pickle_file_path)[0] + _EXTENSION
+
+    @staticmethod
+    def convert(pickle_file_path, gmap_file_path=None):
+        """Convert the given pickled gene mappings to the .gmap format.
+
+        Args:
+            pickle_file_path (str): Pickle of a dict mapping genes to a gene or to a list of (gene, %identity).
+            gmap_file_path (str): Output file path, defaults to the pickle file path with a .gmap extension.
+
+        Returns:
+            str: The path of the .gmap file.
+
+        """
+        if gmap_file_path is None:
+            gmap_file_path = GeneMappings.get_file_path(pickle_file_path=pickle_file_path)
+        with open(pickle_file_path, 'rb') as fh:
+            mappings = pickle.load(fh)
+        GeneMappings.write(mappings=mappings, gmap_file_path=gmap_file_path)
+        return gmap_file_path
+
+    @staticmethod
+    def write(mappings, gmap_file_path):
+        keys = sorted(mappings.keys())
+        kind = _STRING if all(isinstance(v, str) for v in mappings.values()) else _ORTHOLOGUES
+        strings = set(keys)
+        if kind == _STRING:
+            strings.update(mappings.values())
+        else:
+            strings.update(dg[0] for v in mappings.values() for dg in v)
+        strings = sorted(strings)
+        string_ids = {s: i for i, s in enumerate(strings)}
+        encoded = [s.encode('utf-8') for s in strings]
+        str_offsets = np.zeros(len(strings) + 1, dtype='<u8')
+        str_offsets[1:] = np.cumsum([len(b) for b in encoded])
+        key_ids = np.array([string_ids[k] for k in keys], dtype='<u4')
+        # Hash table: load factor <= 0.5, slots store key index + 1 (0 is empty)
+        n_slots = 1
+        while n_slots < 2 * max(len(keys), 1):
+            n_slots <<= 1
+        table = np.zeros(n_slots, dtype='<u4')
+        for idx, k in enumerate(keys):
+            h = _hash(encoded[key_ids[idx]]) & (n_slots - 1)
+            while table[h] != 0:
+                h = (h + 1) & (n_slots - 1)
+            table[h] = idx + 1
+        if kind == _STRING:
+            values = np.array([string_ids[mappings[k]] for k in keys], dtype='<u4')
+            entry_genes = np.zeros(0, dtype='<u4')
+            entry_identities = np.zeros(0, dtype='<f8')
+        else:
+            values = np.zeros(len(keys) + 1, dtype='<u8')
+            values[1:] = np.cumsum([len(mappings[k]) for k in keys])
+            entry_genes = np.array([string_ids[dg[0]] for k in keys for dg in mappings[k]], dtype='<u4')
+            entry_identities = np.array([dg[1] for k in keys for dg in mappings[k]], dtype='<f8')
+
+        tmp_file_path = gmap_file_path + '.tmp{0}'.format(os.getpid())
+        with open(tmp_file_path, 'wb') as fh:
+            fh.write(b'\0' * _HEADER.size)
+            offsets = []
+            offsets.append(_align(fh))
+            fh.write(str_offsets.tobytes())
+            offsets.append(_align(fh))
+            fh.write(b''.join(encoded))
+            for a in [key_ids, table, values, entry_genes, entry_identities]:
+                offsets.append(_align(fh))
+                fh.write(a.tobytes())
+            fh.seek(0)
+            fh.write(_HEADER.pack(_MAGIC, kind, len(strings), len(keys), n_slots, len(entry_genes), *offsets))
+        # Atomic: processes never map a partially written file
+        os.replace(tmp_file_path, gmap_file_path)
+
+
+class _GeneMappingsItemsView(ItemsView):
+
+    def __iter__(self):
+        return self._mapping.iter_items()
+
+
+def load(pickle_file_path):
+    """Load the gene mappings of the given pickle, converting them to the memory-mapped format if needed.
+
+    Falls back on unpickling when the converted file cannot be written (e.g.: read-only installation).
+
+    """
+    gmap_file_path = GeneMappings.get_file_path(pickle_file_path=pickle_file_path)
+    if not os.path.isfile(gmap_file_path) or os.path.getmtime(gmap_file_path) < os.path.getmtime(pickle_file_path):
+        try:
+            print("Converting {0} to {1}...".format(pickle_file_path, gmap_file_path))
+            GeneMappings.convert(pickle_file_path=pickle_file_path, gmap_file_path=gmap_file_path)
+        except OSError as e:
+            print(e)
+            with open(pickle_file_path, 'rb') as fh:
+                return pickle.load(fh)
+    return GeneMappings(file_path=gmap_file_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert pickled gene mappings to memory-mapped .gmap files')
+    parser.add_argument('pickles', metavar='pickle', nargs='+', help='Pickled gene mappings')
+    args = parser.parse_args()
+    for pickle_file_path in args.pickles:
+        print(GeneMappings.convert(pickle_file_path=pickle_file_path))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
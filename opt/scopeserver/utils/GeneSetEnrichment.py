@@ -1,9 +1,12 @@
 import os
 import numpy as np
+from pyscenic.genesig import GeneSignature
 
 from scopeserver.utils import DataFileHandler as dfh
 
 from scopeserver.utils import Constant
+from scopeserver.utils import AUCellRankings as ar
+from scopeserver.utils import EnrichmentCache as ec
 from scopeserver.dataserver.modules.gserver import GServer as gs
 from scopeserver.dataserver.modules.gserver import s_pb2
 
@@ -75,13 +78,31 @@ class GeneSetEnrichment:
     def get_method(self):
             return self.method
 
+    def get_gene_signature(self, name='Gene Signature #1'):
+        with open(self.gene_set_file_path, 'r') as f:
+            # Skip first line because it contains the name of the signature
+            return GeneSignature(name=name,
+                                 gene2weight=[line.strip() for idx, line in enumerate(f) if idx > 0])
+
+    def get_params(self):
+        return {'aucThreshold': Constant._AUCELL_AUC_THRESHOLD, 'rankingsSeed': Constant._AUCELL_RANKINGS_SEED}
+
+    def get_cache_key(self):
+        return ec.EnrichmentCache.get_key(partial_md5_hash=self.loom.partial_md5_hash,
+                                          gene_set_hash=ec.EnrichmentCache.get_gene_set_hash(file_path=self.gene_set_file_path),
+                                          method=self.method,
+                                          params=self.get_params())
+
     def get_AUCell_ranking_filepath(self):
-        AUCell_rankings_file_name = self.loom.get_file_path().split(".")[0] + "." + "AUCell.rankings.loom"
+        AUCell_rankings_file_name = self.loom.get_file_path().split(".")[0] + "." + "AUCell.rankings.npy"
         return os.path.join(self.AUCell_rankings_dir, AUCell_rankings_file_name)
 
     def has_AUCell_rankings(self):
         return os.path.exists(self.get_AUCell_ranking_filepath())
 
+    def get_AUCell_rankings(self):
+        return ar.AUCellRankings(file_path=self.get_AUCell_ranking_filepath())
+
     def run_AUCell(self):
         '''
         '''
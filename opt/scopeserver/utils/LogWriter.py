@@ -0,0 +1,53 @@
+import queue
+import threading
+
+from scopeserver.utils import Constant
+
+_CLOSE = None
+
+
+class LogWriter():
+
+    '''
+    LogWriter class is a file-like log whose lines are written and flushed in batches by a background thread, so
+    that logging never blocks the request path on disk I/O.
+    '''
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.fh = open(file_path, 'w')
+        self.queue = queue.Queue()
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write(self, line):
+        if not self.closed:
+            self.queue.put(line)
+
+    def flush(self):
+        # Lines are flushed by the background thread
+        pass
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(_CLOSE)
+        self.thread.join()
+
+    def run(self):
+        while True:
+            lines = [self.queue.get()]
+            # Drain what is already queued to write it in one batch
+            while len(lines) < Constant._LOG_BATCH_SIZE:
+                try:
+                    lines.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            closing = _CLOSE in lines
+            self.fh.write(''.join(line for line in lines if line is not _CLOSE))
+            self.fh.flush()
+            if closing:
+                self.fh.close()
+                return
@@ -5,8 +5,12 @@ import base64
 from functools import lru_cache
 import pandas as pd
 import time
+import heapq
 
 from scopeserver.utils import DataFileHandler as dfh
+from scopeserver.utils import Constant
+from scopeserver.utils.LoomCatalog import LoomCatalog
+from scopeserver.utils.FeatureStatistics import FeatureStatistics
 
 class Loom():
 
@@ -18,16 +22,23 @@ class Loom():
         print("New .loom created.")
         # Metrics
         self.nUMI = None
+        self.statistics = FeatureStatistics(loom=self)
 
     def get_connection(self):
         return self.loom_connection
 
+    def get_statistics(self):
+        return self.statistics
+
     def get_file_path(self):
         return self.file_path
 
     def get_abs_file_path(self):
         return self.abs_file_path
 
+    def close(self):
+        self.loom_connection.close()
+
     def get_global_attribute_by_name(self, name):
         if name not in self.loom_connection.attrs.keys():
             raise AttributeError("The global attribute {0} does not exist in the .loom file.".format(name))
@@ -212,20 +223,50 @@ class Loom():
     def get_genes(self):
         return self.loom_connection.ra.Gene.astype(str)
 
-    @lru_cache(maxsize=32)
-    def infer_species(self):
-        genes = set(self.get_genes())
-        maxPerc = 0.0
-        maxSpecies = ''
-        mappings = {
+    @lru_cache(maxsize=8)
+    def get_gene_set(self):
+        # All the gene symbols that can be queried for this loom (including the synonyms)
+        return frozenset(self.get_genes()).union(self.get_gene_names().keys())
+
+    @staticmethod
+    def get_species_mappings():
+        return {
             'dmel': dfh.DataFileHandler.dmel_mappings
         }
+
+    def get_genes_sketch(self, size):
+        # Bottom-k sketch: the genes with the smallest hashes are a uniform sample of the genes
+        genes = set(self.get_genes())
+        return heapq.nsmallest(size, genes, key=lambda gene: zlib.crc32(gene.encode('utf-8')))
+
+    def get_species_coverage(self):
+        # Fraction of the genes present in the mappings of each species, estimated on a fixed size sketch so that
+        # adding species mappings does not make the inference linearly more expensive
+        sketch = self.get_genes_sketch(size=Constant._SPECIES_SKETCH_SIZE)
+        mappings = Loom.get_species_mappings()
+        coverage = {}
         for species in mappings.keys():
-            intersect = genes.intersection(mappings[species].keys())
-            if (len(intersect) / len(genes)) > maxPerc:
-                maxPerc = (len(intersect) / len(genes))
-                maxSpecies = species
-        if maxPerc < 0.5:
+            coverage[species] = sum(1 for gene in sketch if gene in mappings[species]) / len(sketch) if len(sketch) > 0 else 0.0
+        return coverage
+
+    @lru_cache(maxsize=32)
+    def infer_species(self):
+        catalog = LoomCatalog.get_catalog()
+        maxSpecies = catalog.get(partial_md5_hash=self.partial_md5_hash, key='species')
+        if maxSpecies is None:
+            coverage = self.get_species_coverage()
+            maxSpecies = 'Unknown'
+            maxPerc = 0.0
+            for species in coverage.keys():
+                if coverage[species] > maxPerc:
+                    maxPerc = coverage[species]
+                    maxSpecies = species
+            if maxPerc < 0.5:
+                maxSpecies = 'Unknown'
+            catalog.set(partial_md5_hash=self.partial_md5_hash, key='speciesCoverage', value=coverage)
+            catalog.set(partial_md5_hash=self.partial_md5_hash, key='species', value=maxSpecies)
+        mappings = Loom.get_species_mappings()
+        if maxSpecies not in mappings:
             return 'Unknown', {}
         return maxSpecies, mappings[maxSpecies]
 
@@ -272,9 +313,13 @@ class Loom():
             return self.nUMI
         if self.has_ca_attr(name="nUMI"):
             return self.loom_connection.ca.nUMI
-        # Compute nUMI on the fly
+        # Compute nUMI on the fly (chunked over the genes to avoid loading the whole matrix)
         calc_nUMI_start_time = time.time()
-        self.nUMI = self.loom_connection[:,:].sum(axis=0)
+        n_genes = self.loom_connection.shape[0]
+        nUMI = np.zeros(self.get_nb_cells())
+        for start in range(0, n_genes, Constant._STATISTICS_BATCH_SIZE):
+            nUMI += self.loom_connection[start:min(start + Constant._STATISTICS_BATCH_SIZE, n_genes), :].sum(axis=0)
+        self.nUMI = nUMI
         print("Debug: %s seconds elapsed (calculating nUMI) ---" % (time.time() - calc_nUMI_start_time))
         return self.nUMI
 
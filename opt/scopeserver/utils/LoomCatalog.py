@@ -0,0 +1,64 @@
+import os
+import json
+import threading
+
+from scopeserver.utils import DataFileHandler as dfh
+
+
+class LoomCatalog():
+
+    '''
+    LoomCatalog class persists properties derived from the .loom files (e.g.: inferred species) so that they are not
+    recomputed each time a loom is opened or the server restarts. Entries are keyed by the partial md5 hash of the
+    loom, the catalog is stored as JSON in the Config folder.
+    '''
+
+    _catalog = None
+    _lock = threading.Lock()
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.entries = {}
+        self.read()
+
+    @staticmethod
+    def get_catalog():
+        with LoomCatalog._lock:
+            if LoomCatalog._catalog is None:
+                LoomCatalog._catalog = LoomCatalog(file_path=os.path.join(dfh.DataFileHandler.get_data_dir_path_by_file_type(file_type="Config"), 'Loom_Catalog.json'))
+            return LoomCatalog._catalog
+
+    def read(self):
+        if not os.path.isfile(self.file_path):
+            return
+        mtime = os.path.getmtime(self.file_path)
+        if mtime == self.mtime:
+            return
+        try:
+            with open(self.file_path, 'r') as fh:
+                self.entries = json.load(fh)
+            self.mtime = mtime
+        except ValueError as e:
+            print("Could not read the loom catalog: {0}".format(e))
+
+    def get(self, partial_md5_hash, key):
+        with self.lock:
+            if partial_md5_hash not in self.entries or key not in self.entries[partial_md5_hash]:
+                # Could have been added by another server process
+                self.read()
+            try:
+                return self.entries[partial_md5_hash][key]
+            except KeyError:
+                return None
+
+    def set(self, partial_md5_hash, key, value):
+        with self.lock:
+            self.read()
+            self.entries.setdefault(partial_md5_hash, {})[key] = value
+            tmp_file_path = self.file_path + '.tmp{0}'.format(os.getpid())
+            with open(tmp_file_path, 'w') as fh:
+                json.dump(self.entries, fh)
+            os.replace(tmp_file_path, self.file_path)
+            self.mtime = os.path.getmtime(self.file_path)
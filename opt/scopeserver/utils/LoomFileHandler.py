@@ -1,5 +1,7 @@
 import os
+import fcntl
 import hashlib
+import h5py
 import loompy as lp
 
 from scopeserver.utils import DataFileHandler as dfh
@@ -7,8 +9,10 @@ from scopeserver.utils.Loom import Loom
 
 class LoomFileHandler():
 
-    def __init__(self):
+    def __init__(self, read_only=False):
         self.active_looms = {}
+        # Server workers (supervisor mode) share the looms: opened read-only
+        self.read_only = read_only
         self.loom_dir = dfh.DataFileHandler.get_data_dir_path_by_file_type(file_type="Loom")
     
     def add_loom(self, partial_md5_hash, file_path, abs_file_path, loom_connection):
@@ -21,6 +25,16 @@ class LoomFileHandler():
         #     loom = lp.connect(file_path, mode='r+')
         # else:
         #     loom = lp.connect(file_path, mode='r')\
+        if self.read_only:
+            if LoomFileHandler.prepare_loom_file(abs_file_path=abs_file_path):
+                partial_md5_hash = LoomFileHandler.get_partial_md5_hash(abs_file_path, 10000)
+            try:
+                loom_connection = lp.connect(abs_file_path, mode='r')
+            except KeyError as e:
+                # Not removed: it may be readable by a server with write access
+                print(e)
+                return None
+            return self.add_loom(partial_md5_hash=partial_md5_hash, file_path=file_path, abs_file_path=abs_file_path, loom_connection=loom_connection)
         try:
             loom_connection = lp.connect(abs_file_path, mode='r+')
         except KeyError as e:
@@ -29,6 +43,42 @@ class LoomFileHandler():
             return None
         return self.add_loom(partial_md5_hash=partial_md5_hash, file_path=file_path, abs_file_path=abs_file_path, loom_connection=loom_connection)
 
+    @staticmethod
+    def is_prepared(abs_file_path):
+        with h5py.File(abs_file_path, 'r') as f:
+            return 'row_edges' in f and 'col_edges' in f and 'MetaData' in f.attrs
+
+    @staticmethod
+    def prepare_loom_file(abs_file_path):
+        """Write what the read-only connections need (graph groups of loompy, meta data) if missing. The first worker
+        to open the loom prepares it, under an exclusive lock, before any of them opens it read-only.
+
+        Returns:
+            bool: True if the loom has been modified.
+
+        """
+        lock_file_path = os.path.join(os.path.dirname(abs_file_path), '.{0}.lock'.format(os.path.basename(abs_file_path)))
+        with open(lock_file_path, 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if LoomFileHandler.is_prepared(abs_file_path=abs_file_path):
+                return False
+            print("Debug: preparing the loom file {0}...".format(abs_file_path))
+            try:
+                loom_connection = lp.connect(abs_file_path, mode='r+')
+            except (KeyError, OSError) as e:
+                # e.g.: opened read-only by a worker because its meta data could not be generated
+                print(e)
+                return False
+            try:
+                loom = Loom(partial_md5_hash=None, file_path=abs_file_path, abs_file_path=abs_file_path, loom_connection=loom_connection)
+                if not loom.has_meta_data():
+                    loom.generate_meta_data()
+            except Exception as e:
+                print(e)
+            finally:
+                loom_connection.close()
+            return True
+
     @staticmethod
     def get_partial_md5_hash(file_path, last_n_kb):
         with open(file_path, 'rb') as f:
@@ -57,6 +107,13 @@ class LoomFileHandler():
             self.active_looms[partial_md5_hash] = self.get_loom_connection(loom_file_path=loom_file_path) #, rw=False)
             print('{0} now ro'.format(loom_file_path))
         
+    def close_loom(self, abs_file_path):
+        # Close the connections to the given loom (e.g.: before it is rewritten), reopened by the next get_loom
+        for partial_md5_hash, loom in list(self.active_looms.items()):
+            if os.path.realpath(loom.get_abs_file_path()) == os.path.realpath(abs_file_path):
+                del(self.active_looms[partial_md5_hash])
+                loom.close()
+
     def get_loom_absolute_file_path(self, loom_file_path):
         return os.path.join(self.loom_dir, loom_file_path)
     
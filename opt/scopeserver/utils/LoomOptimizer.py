@@ -0,0 +1,200 @@
+import os
+import sys
+import time
+import fcntl
+import argparse
+import threading
+import numpy as np
+import h5py
+
+from scopeserver.utils import Constant
+
+
+def get_matrix_chunks(shape, itemsize):
+    # A few genes by many cells: the expression of a gene is read from a few chunks
+    n_genes, n_cells = shape
+    chunk_genes = max(min(Constant._LOOM_OPTIMIZER_CHUNK_GENES, n_genes), 1)
+    chunk_cells = max(min(Constant._LOOM_OPTIMIZER_CHUNK_SIZE // (chunk_genes * itemsize), n_cells), 1)
+    return chunk_genes, chunk_cells
+
+
+def get_attr_chunks(shape, itemsize):
+    # Attributes are read as a whole: large chunks along the first axis
+    row_size = int(np.prod(shape[1:], dtype=np.int64)) * itemsize
+    return (max(min(Constant._LOOM_OPTIMIZER_ATTR_CHUNK_SIZE // max(row_size, 1), shape[0]), 1),) + tuple(shape[1:])
+
+
+class LoomOptimizer():
+
+    '''
+    LoomOptimizer class rewrites a .loom with a layout suited to the way SCope reads it: the matrix and the layers are
+    chunked for per-gene reads (a few genes by many cells per chunk) and compressed with a fast filter (gzip level 2
+    and shuffle by default, lzf optionally). The chunked attributes are stored in large chunks, the contiguous ones are
+    kept contiguous (they are read as a whole). Everything else (groups, graphs, attributes of the file and of the
+    datasets, maximum shapes) is copied as is: the file remains a valid loom.
+
+    The loom is rewritten to a temporary file, which replaces the original once complete. A loom rewritten in place
+    must not be open elsewhere: the server closes its connections first (on_replace), the command line tool is meant
+    to be run while the server is stopped (or with --output).
+    '''
+
+    def __init__(self, file_path, compression=Constant._LOOM_OPTIMIZER_COMPRESSION):
+        self.file_path = file_path
+        self.compression = compression
+
+    def get_filters(self, dtype):
+        filters = {'compression': self.compression}
+        if self.compression == 'gzip':
+            filters['compression_opts'] = Constant._LOOM_OPTIMIZER_COMPRESSION_LEVEL
+        # Byte shuffling makes the numbers compress better
+        filters['shuffle'] = dtype.kind in 'iuf'
+        return filters
+
+    @staticmethod
+    def is_matrix(name, dataset):
+        return len(dataset.shape) == 2 and (name == 'matrix' or name.startswith('layers/'))
+
+    def is_optimized(self):
+        with h5py.File(self.file_path, 'r') as f:
+            matrix = f['matrix']
+            return matrix.chunks == get_matrix_chunks(shape=matrix.shape, itemsize=matrix.dtype.itemsize) and matrix.compression == self.compression
+
+    def optimize(self, output_file_path=None, on_replace=None):
+        """Rewrite the loom to output_file_path (in place if None). The loom is locked as when it is prepared for the
+        server workers (see LoomFileHandler.prepare_loom_file).
+
+        Args:
+            on_replace (function): Called (with the lock held) right before the output file is replaced, e.g.: to close
+                the connections to the loom.
+
+        Yields:
+            float: The fraction of the matrices copied so far.
+
+        """
+        output_file_path = self.file_path if output_file_path is None else output_file_path
+        tmp_file_path = output_file_path + '.tmp{0}_{1}'.format(os.getpid(), threading.get_ident())
+        lock_file_path = os.path.join(os.path.dirname(self.file_path), '.{0}.lock'.format(os.path.basename(self.file_path)))
+        with open(lock_file_path, 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                with h5py.File(self.file_path, 'r') as src, h5py.File(tmp_file_path, 'w') as dst:
+                    for key, value in src.attrs.items():
+                        dst.attrs[key] = value
+                    names = []
+                    src.visit(names.append)
+                    matrices = [name for name in names if isinstance(src[name], h5py.Dataset) and LoomOptimizer.is_matrix(name=name, dataset=src[name])]
+                    total = max(sum(src[name].size for name in matrices), 1)
+                    copied = 0
+                    for name in names:
+                        if name in matrices:
+                            for n in self.copy_matrix(src=src[name], dst=dst, name=name):
+                                copied += n
+                                yield copied / total
+                        elif isinstance(src[name], h5py.Group):
+                            self.copy_attrs(src=src[name], dst=dst.require_group(name))
+                        else:
+                            self.copy_dataset(src=src[name], dst=dst, name=name)
+                if on_replace is not None:
+                    on_replace()
+                os.replace(tmp_file_path, output_file_path)
+            finally:
+                if os.path.exists(tmp_file_path):
+                    os.remove(tmp_file_path)
+
+    @staticmethod
+    def copy_attrs(src, dst):
+        for key, value in src.attrs.items():
+            dst.attrs[key] = value
+
+    def copy_matrix(self, src, dst, name):
+        chunks = get_matrix_chunks(shape=src.shape, itemsize=src.dtype.itemsize)
+        dataset = dst.create_dataset(name, shape=src.shape, dtype=src.dtype, maxshape=src.maxshape, chunks=chunks, **self.get_filters(dtype=src.dtype))
+        LoomOptimizer.copy_attrs(src=src, dst=dataset)
+        # Bands of genes aligned on the chunks of both layouts: no chunk is read or written twice
+        step = int(np.lcm(chunks[0], src.chunks[0] if src.chunks is not None else 1))
+        band = max(Constant._LOOM_OPTIMIZER_COPY_SIZE // max(step * src.shape[1] * src.dtype.itemsize, 1), 1) * step
+        for start in range(0, src.shape[0], band):
+            end = min(start + band, src.shape[0])
+            dataset[start:end, :] = src[start:end, :]
+            yield (end - start) * src.shape[1]
+
+    def copy_dataset(self, src, dst, name):
+        if src.chunks is None or src.size == 0:
+            # Contiguous (best for datasets read as a whole, e.g.: attributes written by loompy), scalar or empty
+            dst.copy(src, name)
+            return
+        dataset = dst.create_dataset(name,
+                                     shape=src.shape,
+                                     dtype=src.dtype,
+                                     maxshape=src.maxshape,
+                                     chunks=get_attr_chunks(shape=src.shape, itemsize=src.dtype.itemsize),
+                                     **self.get_filters(dtype=src.dtype))
+        dataset[...] = src[...]
+        LoomOptimizer.copy_attrs(src=src, dst=dataset)
+
+    @staticmethod
+    def benchmark(file_path, n_genes=Constant._LOOM_OPTIMIZER_BENCHMARK_GENES):
+        """Time the reads of SCope on the given loom: random genes (expression of a gene), a batch of genes
+        (statistics, nUMI), a block of cells (AUCell rankings) and the column attributes. The reads are done twice,
+        the second pass is timed (i.e.: page cache warm, HDF5 chunk cache cold).
+
+        Returns:
+            dict: The size of the file (bytes) and the time (seconds) of each read.
+
+        """
+        timings = {}
+        # The timings of the first pass are overwritten
+        for _ in range(2):
+            with h5py.File(file_path, 'r') as f:
+                matrix = f['matrix']
+                genes = np.random.RandomState(0).choice(matrix.shape[0], size=min(n_genes, matrix.shape[0]), replace=False)
+                start_time = time.time()
+                for gene in genes:
+                    matrix[gene, :]
+                timings['gene'] = (time.time() - start_time) / max(len(genes), 1)
+                start_time = time.time()
+                matrix[:min(Constant._STATISTICS_BATCH_SIZE, matrix.shape[0]), :]
+                timings['genes'] = time.time() - start_time
+                start_time = time.time()
+                matrix[:, :min(Constant._AUCELL_BLOCK_SIZE, matrix.shape[1])]
+                timings['cells'] = time.time() - start_time
+                start_time = time.time()
+                for dataset in f['col_attrs'].values() if 'col_attrs' in f else []:
+                    dataset[...]
+                timings['col_attrs'] = time.time() - start_time
+        timings['size'] = os.path.getsize(file_path)
+        return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rechunk and recompress .loom files for SCope (per-gene reads)')
+    parser.add_argument('looms', metavar='loom', nargs='+', help='Loom files, rewritten in place (not while a server has them open)')
+    parser.add_argument('-o', '--output', help='Output file (a single loom only)')
+    parser.add_argument('-c', '--compression', choices=['gzip', 'lzf'], default=Constant._LOOM_OPTIMIZER_COMPRESSION,
+                        help='Compression filter (lzf: faster, but only readable by h5py)')
+    parser.add_argument('-f', '--force', action='store_true', help='Rewrite the looms already optimized')
+    parser.add_argument('--no-benchmark', action='store_true', help='Do not benchmark the reads before and after')
+    args = parser.parse_args()
+    if args.output is not None and len(args.looms) > 1:
+        parser.error('--output requires a single loom')
+    for loom_file_path in args.looms:
+        optimizer = LoomOptimizer(file_path=loom_file_path, compression=args.compression)
+        if not args.force and optimizer.is_optimized():
+            print("{0} is already optimized.".format(loom_file_path))
+            continue
+        before = None if args.no_benchmark else LoomOptimizer.benchmark(file_path=loom_file_path)
+        start_time = time.time()
+        for _ in optimizer.optimize(output_file_path=args.output):
+            pass
+        output_file_path = loom_file_path if args.output is None else args.output
+        print("{0} optimized in {1:.1f} seconds.".format(output_file_path, time.time() - start_time))
+        if before is None:
+            continue
+        after = LoomOptimizer.benchmark(file_path=output_file_path)
+        print("  file size: {0:.1f} MB -> {1:.1f} MB".format(before['size'] / 1024 ** 2, after['size'] / 1024 ** 2))
+        for key, description in [('gene', 'read of a gene'), ('genes', 'read of a batch of genes'), ('cells', 'read of a block of cells'), ('col_attrs', 'read of the column attributes')]:
+            print("  {0}: {1:.2f} ms -> {2:.2f} ms".format(description, before[key] * 1000, after[key] * 1000))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
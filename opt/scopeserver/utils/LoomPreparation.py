@@ -0,0 +1,134 @@
+import time
+import functools
+import threading
+from collections import OrderedDict
+from contextlib import closing
+
+from scopeserver.utils import Constant
+from scopeserver.utils import GeneSetEnrichment as _gse
+from scopeserver.utils import LoomOptimizer as lo
+from scopeserver.dataserver.modules.gserver import s_pb2
+
+_STAGES = ['optimization', 'metadata', 'nUMI', 'species', 'search_space', 'statistics', 'rankings']
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+class LoomPreparation():
+
+    '''
+    LoomPreparation class prepares an uploaded loom in the background: the data otherwise derived lazily on the first
+    interaction (meta data, nUMI, species, search space, statistics and optionally the AUCell rankings) are computed
+    stage by stage, so that a fresh upload is as fast to browse as a warmed public dataset. The loom can first be
+    rewritten by the LoomOptimizer (optimization stage). The status of each stage is polled by the UI
+    (getLoomPreparationStatus).
+    '''
+
+    class Stage:
+        def __init__(self, name):
+            self.name = name
+            self.status = PENDING
+            self.progress = 0
+            self.message = ''
+
+    def __init__(self, scope, loom_file_path, rankings=False, optimization=False):
+        self.scope = scope
+        self.loom_file_path = loom_file_path
+        self.loom = None
+        self.lock = threading.Lock()
+        optional = {'rankings': rankings, 'optimization': optimization}
+        self.stages = OrderedDict((name, LoomPreparation.Stage(name=name)) for name in _STAGES if optional.get(name, True))
+
+    def get_loom_file_path(self):
+        return self.loom_file_path
+
+    def update_stage(self, name, status, progress, message=''):
+        with self.lock:
+            stage = self.stages[name]
+            stage.status = status
+            stage.progress = progress
+            stage.message = message
+
+    def is_done(self):
+        with self.lock:
+            return all(stage.status not in (PENDING, RUNNING) for stage in self.stages.values())
+
+    def run(self):
+        start_time = time.time()
+        for name in self.stages.keys():
+            if self.loom is None and name not in ('optimization', 'metadata'):
+                self.update_stage(name=name, status=SKIPPED, progress=0, message="The loom could not be opened.")
+                continue
+            self.update_stage(name=name, status=RUNNING, progress=0)
+            try:
+                progresses = getattr(self, 'prepare_' + name)()
+                if progresses is not None:
+                    with closing(progresses):
+                        for progress in progresses:
+                            self.update_stage(name=name, status=RUNNING, progress=progress)
+                self.update_stage(name=name, status=DONE, progress=1)
+            except Exception as e:
+                print("Could not prepare the {0} of {1}: {2}".format(name, self.loom_file_path, e))
+                self.update_stage(name=name, status=FAILED, progress=self.stages[name].progress, message=str(e))
+        # Kept open by the LoomFileHandler
+        self.loom = None
+        print("Debug: %s seconds elapsed (preparing {0}) ---".format(self.loom_file_path) % (time.time() - start_time))
+
+    def prepare_optimization(self):
+        # Before the loom is opened: rechunked for per-gene reads
+        abs_file_path = self.scope.lfh.get_loom_absolute_file_path(loom_file_path=self.loom_file_path)
+        optimizer = lo.LoomOptimizer(file_path=abs_file_path)
+        if optimizer.is_optimized():
+            return None
+        # Rewritten in place: the connections opened in the meantime (e.g.: getMyLooms opens the looms r+) are closed
+        # before the copy (no write while it is read) and before the loom is replaced
+        close_loom = functools.partial(self.scope.lfh.close_loom, abs_file_path=abs_file_path)
+        close_loom()
+        return optimizer.optimize(on_replace=close_loom)
+
+    def prepare_metadata(self):
+        self.loom = self.scope.lfh.get_loom(loom_file_path=self.loom_file_path)
+        if self.loom is None:
+            raise ValueError("The loom could not be opened.")
+        if not self.loom.get_file_metadata()['hasGlobalMeta']:
+            self.loom.generate_meta_data()
+        # Opening the loom (r+) and writing the meta data may change its partial md5 hash: the next stages are keyed
+        # by the hash the views will compute
+        self.loom = self.scope.lfh.get_loom(loom_file_path=self.loom_file_path)
+
+    def prepare_nUMI(self):
+        self.loom.get_nUMI()
+
+    def prepare_species(self):
+        self.loom.infer_species()
+
+    def prepare_search_space(self):
+        self.scope.get_search_space(loom=self.loom, cross_species='')
+
+    def prepare_statistics(self):
+        statistics = self.loom.get_statistics()
+        # Computed in the background unless available or already being computed (e.g.: requested by a getVmax)
+        statistics.compute_async()
+        while statistics.is_computing():
+            time.sleep(Constant._LOOM_PREPARATION_POLL_INTERVAL)
+        if not statistics.is_available():
+            raise ValueError("The statistics could not be computed.")
+
+    def prepare_rankings(self):
+        gse = _gse.GeneSetEnrichment(scope=self.scope, method="AUCell", loom=self.loom, gene_set_file_path=None, annotation='')
+        rankings = gse.get_AUCell_rankings()
+        if rankings.exists():
+            return None
+        return rankings.build(loom=self.loom, compute_backend=self.scope.compute_backend)
+
+    def get_status_reply(self):
+        with self.lock:
+            stages = [s_pb2.LoomPreparationStage(name=stage.name,
+                                                 status=stage.status,
+                                                 progress=s_pb2.Progress(value=stage.progress, status=stage.message))
+                      for stage in self.stages.values()]
+        return s_pb2.LoomPreparationStatusReply(loomFilePath=self.loom_file_path, stages=stages, isDone=self.is_done())
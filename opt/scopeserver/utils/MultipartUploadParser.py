@@ -0,0 +1,172 @@
+import os
+import cgi
+import hashlib
+import tempfile
+
+from scopeserver.utils import Constant
+
+_HDF5_SIGNATURE = b'\x89HDF\r\n\x1a\n'
+
+
+class UploadedFile():
+
+    '''
+    UploadedFile class is a file part of a multipart upload. It is written to a hidden temporary file of its
+    destination directory as it is received (moved in place without copy once validated), its md5 hash is computed
+    on the fly and the HDF5 signature is looked for at the offsets allowed for the superblock (0, 512, 1024, ...).
+    '''
+
+    TMPPREFIX = '.tmpupload'
+
+    def __init__(self, filename, directory):
+        self.filename = filename
+        self.directory = directory
+        fd, self.tmp_file_path = tempfile.mkstemp(dir=directory, prefix=UploadedFile.TMPPREFIX)
+        self.f = os.fdopen(fd, 'wb')
+        self.md5 = hashlib.md5()
+        self.size = 0
+        self.signature_offset = 0
+        self.signature = b''
+        self.hdf5 = None
+
+    def write(self, data):
+        self.check_hdf5_signature(data=data)
+        self.md5.update(data)
+        self.f.write(data)
+        self.size += len(data)
+
+    def check_hdf5_signature(self, data):
+        # data starts at offset self.size of the file
+        while self.hdf5 is None:
+            start = self.signature_offset + len(self.signature) - self.size
+            if start >= len(data):
+                return
+            self.signature += bytes(data[start:start + len(_HDF5_SIGNATURE) - len(self.signature)])
+            if len(self.signature) < len(_HDF5_SIGNATURE):
+                return
+            if self.signature == _HDF5_SIGNATURE:
+                self.hdf5 = True
+            else:
+                self.signature_offset = max(512, self.signature_offset * 2)
+                self.signature = b''
+
+    def is_hdf5(self):
+        return self.hdf5 is True
+
+    def get_md5_hash(self):
+        return self.md5.hexdigest()
+
+    def close(self):
+        if not self.f.closed:
+            self.f.close()
+
+    def move(self, file_path):
+        self.close()
+        os.rename(self.tmp_file_path, file_path)
+        self.tmp_file_path = None
+
+    def remove(self):
+        self.close()
+        if self.tmp_file_path is not None and os.path.exists(self.tmp_file_path):
+            os.remove(self.tmp_file_path)
+
+
+class MultipartUploadParser():
+
+    '''
+    MultipartUploadParser class parses a multipart/form-data request body in one pass over the socket: the form fields
+    are kept in memory, the files are streamed to the directory returned by get_directory(fields) (called with the
+    fields received before the file). Nothing is buffered but the current chunk.
+    '''
+
+    def __init__(self, fp, headers, get_directory):
+        self.fp = fp
+        self.get_directory = get_directory
+        content_type, params = cgi.parse_header(headers.get('Content-Type', ''))
+        if content_type != 'multipart/form-data' or 'boundary' not in params:
+            raise ValueError("Not a multipart/form-data request.")
+        self.delimiter = b'\r\n--' + params['boundary'].encode('latin-1')
+        self.remaining = int(headers.get('Content-Length', -1))
+        self.fields = {}
+        self.files = []
+
+    def keys(self):
+        return self.fields.keys()
+
+    def getvalue(self, key, default=None):
+        return self.fields.get(key, default)
+
+    def read(self, buffer):
+        size = Constant._UPLOAD_CHUNK_SIZE if self.remaining < 0 else min(Constant._UPLOAD_CHUNK_SIZE, self.remaining)
+        chunk = self.fp.read(size) if size > 0 else b''
+        if not chunk:
+            raise ValueError("Unexpected end of the multipart body.")
+        self.remaining -= len(chunk)
+        buffer += chunk
+
+    def read_until(self, buffer, separator, max_size):
+        while True:
+            i = buffer.find(separator)
+            if i >= 0:
+                data = bytes(buffer[:i])
+                del buffer[:i + len(separator)]
+                return data
+            if len(buffer) > max_size:
+                raise ValueError("Multipart header or field too large.")
+            self.read(buffer)
+
+    def read_part(self, buffer, write):
+        # Keep the bytes which could be the beginning of the delimiter in the buffer
+        while True:
+            i = buffer.find(self.delimiter)
+            if i >= 0:
+                write(memoryview(buffer)[:i])
+                del buffer[:i + len(self.delimiter)]
+                return
+            n = len(buffer) - len(self.delimiter) + 1
+            if n > 0:
+                write(memoryview(buffer)[:n])
+                del buffer[:n]
+            self.read(buffer)
+
+    def parse(self):
+        # Prepend a line break so that the first delimiter is found as the next ones
+        buffer = bytearray(b'\r\n')
+        try:
+            # Preamble
+            self.read_part(buffer, write=lambda data: None)
+            while True:
+                while len(buffer) < 2:
+                    self.read(buffer)
+                if buffer[:2] == b'--':
+                    break
+                headers = self.read_until(buffer, separator=b'\r\n\r\n', max_size=Constant._UPLOAD_MAX_FIELD_SIZE)
+                self.parse_part(buffer, headers=headers)
+        except Exception:
+            for uploaded_file in self.files:
+                uploaded_file.remove()
+            raise
+        for uploaded_file in self.files:
+            uploaded_file.close()
+        return self
+
+    def parse_part(self, buffer, headers):
+        disposition = {}
+        for line in headers.decode('utf-8', 'replace').split('\r\n'):
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'content-disposition':
+                disposition = cgi.parse_header(value.strip())[1]
+        if 'filename' in disposition:
+            uploaded_file = UploadedFile(filename=disposition['filename'], directory=self.get_directory(self.fields))
+            self.files.append(uploaded_file)
+            self.read_part(buffer, write=uploaded_file.write)
+            uploaded_file.close()
+            return
+        value = bytearray()
+
+        def write(data):
+            if len(value) + len(data) > Constant._UPLOAD_MAX_FIELD_SIZE:
+                raise ValueError("Multipart header or field too large.")
+            value.extend(data)
+        self.read_part(buffer, write=write)
+        self.fields[disposition.get('name', '')] = value.decode('utf-8', 'replace')
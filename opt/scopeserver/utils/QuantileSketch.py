@@ -0,0 +1,105 @@
+import numpy as np
+
+
+def get_centroid_indices(ranks, nonzero, size):
+    # t-digest k1 scale function: centroids are smaller (more accurate) in the tails of the distribution
+    q = (ranks + 0.5) / np.maximum(nonzero, 1)
+    k = size * (np.arcsin(np.clip(2 * q - 1, -1, 1)) / np.pi + 0.5)
+    return np.minimum(np.floor(k), size - 1).astype(np.int64)
+
+
+def get_centroid_weights(nonzero, size):
+    """Get the number of values summarised by each centroid of a sketch built with build_sketches().
+
+    The centroids of the sketches are fully defined by the number of non-zero values, so only their means are stored.
+
+    """
+    nonzero = np.atleast_1d(nonzero).astype(np.int64)
+    weights = np.zeros((len(nonzero), size))
+    for i, n in enumerate(nonzero):
+        if n > 0:
+            weights[i] = np.bincount(get_centroid_indices(ranks=np.arange(n), nonzero=n, size=size), minlength=size)
+    return weights
+
+
+def build_sketches(vals, size):
+    """Build a quantile sketch for each row of the given 2D array of non-negative values.
+
+    Zeros are counted apart (expression data is mostly zeros), the non-zero values are summarised by at most size
+    centroids (t-digest style).
+
+    Returns:
+        tuple: (nonzero, max, means): number of non-zero values, max value and centroid means of each row.
+
+    """
+    vals = np.atleast_2d(vals)
+    n_rows, n_cols = vals.shape
+    means = np.zeros((n_rows, size), dtype=np.float32)
+    if n_cols == 0:
+        return np.zeros(n_rows, dtype=np.int64), np.zeros(n_rows, dtype=np.float32), means
+    sorted_vals = np.sort(vals, axis=1)
+    nonzero = np.count_nonzero(sorted_vals, axis=1)
+    # Rank of each value among the non-zero values of its row (zeros are sorted first and get a negative rank)
+    ranks = np.arange(n_cols)[np.newaxis, :] - (n_cols - nonzero)[:, np.newaxis]
+    is_nonzero = ranks >= 0
+    centroids = get_centroid_indices(ranks=ranks, nonzero=nonzero[:, np.newaxis], size=size)
+    flat_indices = (np.arange(n_rows)[:, np.newaxis] * size + centroids)[is_nonzero]
+    sums = np.bincount(flat_indices, weights=sorted_vals[is_nonzero], minlength=n_rows * size)
+    counts = np.bincount(flat_indices, minlength=n_rows * size)
+    means[:] = (sums / np.maximum(counts, 1)).reshape(n_rows, size)
+    return nonzero, sorted_vals[:, -1].astype(np.float32), means
+
+
+class QuantileSketch():
+
+    '''
+    QuantileSketch class is a mergeable summary of the distribution of a set of values: number of zeros, max and
+    weighted centroids of the non-zero values. Sketches of disjoint sets of cells (e.g.: the values of an annotation,
+    several looms) are merged by concatenating their centroids.
+    '''
+
+    def __init__(self, zeros, max_value, means, weights):
+        self.zeros = int(zeros)
+        self.max_value = float(max_value)
+        self.means = np.asarray(means, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+
+    @staticmethod
+    def from_stored(n_values, nonzero, max_value, means):
+        size = len(means)
+        return QuantileSketch(zeros=n_values - nonzero,
+                              max_value=max_value,
+                              means=means,
+                              weights=get_centroid_weights(nonzero=nonzero, size=size)[0])
+
+    @staticmethod
+    def merge(sketches):
+        sketches = list(sketches)
+        return QuantileSketch(zeros=sum(s.zeros for s in sketches),
+                              max_value=max([s.max_value for s in sketches] + [0]),
+                              means=np.concatenate([s.means for s in sketches] + [np.zeros(0)]),
+                              weights=np.concatenate([s.weights for s in sketches] + [np.zeros(0)]))
+
+    def get_count(self):
+        return self.zeros + int(self.weights.sum())
+
+    def get_max(self):
+        return self.max_value
+
+    def get_percentile(self, q):
+        """Estimate the q-th percentile (same linear interpolation between ranks as np.percentile)."""
+        n = self.get_count()
+        if n == 0:
+            return 0.0
+        rank = q / 100 * (n - 1)
+        if rank <= self.zeros - 1:
+            return 0.0
+        keep = self.weights > 0
+        order = np.argsort(self.means[keep])
+        means = self.means[keep][order]
+        weights = self.weights[keep][order]
+        # Each centroid is located at the middle rank of the values it summarises
+        starts = self.zeros + np.cumsum(weights) - weights
+        xs = np.concatenate([[self.zeros - 1] if self.zeros > 0 else [], starts + (weights - 1) / 2, [n - 1]])
+        ys = np.concatenate([[0.0] if self.zeros > 0 else [], means, [self.max_value]])
+        return float(np.interp(rank, xs, ys))
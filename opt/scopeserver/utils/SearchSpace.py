@@ -3,6 +3,32 @@ from functools import lru_cache
 
 from scopeserver.utils import DataFileHandler as dfh
 
+_CROSS_SPECIES_NAMES = {'hsap': 'Human', 'mmus': 'Mouse'}
+
+
+@lru_cache(maxsize=None)
+def get_orthologue_index(cross_species):
+    '''
+    Build (once per process) the search space of the genes of the given species that have an orthologue in
+    Drosophila melanogaster. The index is shared by all the looms: the orthologues not present in a loom are
+    filtered out at query time.
+
+    Keys follow the SearchSpace layout (elementCF, element, element_type), values are tuples of
+    (drosElement, %match, description).
+    '''
+    if cross_species == 'hsap':
+        mappings = dfh.DataFileHandler.hsap_to_dmel_mappings
+    elif cross_species == 'mmus':
+        mappings = dfh.DataFileHandler.mmus_to_dmel_mappings
+    else:
+        raise ValueError("No orthologue mappings for species {0}.".format(cross_species))
+    description = 'Orthologue of {0}, {1:.2f}% identity (' + _CROSS_SPECIES_NAMES[cross_species] + ' -> Drosophila)'
+    index = {}
+    for element, orthologues in mappings.items():
+        index[(element.casefold(), element, 'gene')] = tuple((dg[0], dg[1], description.format(element, dg[1])) for dg in orthologues)
+    return index
+
+
 class SearchSpace(dict):
 
     '''
@@ -35,6 +61,9 @@ class SearchSpace(dict):
         for element in elements:
             self.add_element(element=element, element_type=element_type)
     
+    def get_orthologue_index(self):
+        return self.orthologue_index
+
     def build(self):
         if self.cross_species != '':
             self.add_cross_species_genes()
@@ -58,16 +87,17 @@ class SearchSpace(dict):
         return self
 
     def add_cross_species_genes(self):
-        if self.cross_species == 'hsap' and self.species == 'dmel':
-            self.add_elements(elements=dfh.DataFileHandler.hsap_to_dmel_mappings.keys(), element_type='gene')
-        elif self.cross_species == 'mmus' and self.species == 'dmel':
-            self.add_elements(elements=dfh.DataFileHandler.mmus_to_dmel_mappings.keys(), element_type='gene')
+        # Reference the shared orthologue index instead of copying it for each loom
+        if self.species == 'dmel':
+            self.orthologue_index = get_orthologue_index(cross_species=self.cross_species)
+        else:
+            self.orthologue_index = {}
 
     def add_genes(self):
         # Add genes to search space
         if len(self.gene_mappings) > 0:
             genes = set(self.loom.get_genes())
-            shrink_mappings = set([x for x in dfh.DataFileHandler.dmel_mappings.keys() if x in genes or dfh.DataFileHandler.dmel_mappings[x] in genes])
+            shrink_mappings = set([x for x, y in dfh.DataFileHandler.dmel_mappings.items() if x in genes or y in genes])
             self.add_elements(elements=shrink_mappings, element_type='gene')
         else:
             self.add_elements(elements=self.loom.get_genes(), element_type='gene')
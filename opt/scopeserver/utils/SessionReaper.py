@@ -0,0 +1,131 @@
+import os
+import time
+import heapq
+import shutil
+import threading
+
+from scopeserver.utils import Constant
+
+
+class SessionReaper():
+
+    '''
+    SessionReaper class expires the UUIDs in a background thread. The deadlines are kept in a min-heap, the thread
+    sleeps until the earliest one. The store stays the source of truth: stale heap entries are checked against it
+    before expiring, and it is rescanned periodically to pick up the UUIDs added by other server processes.
+
+    The user folders of the expired UUIDs are deleted one at a time, at most one per Constant._REAPER_DELETE_INTERVAL.
+    The folders of a UUID which came back in the meantime (e.g.: getRemainingUUIDTime) are kept.
+
+    The metrics of the active sessions (get_metrics) are logged at each rescan.
+    '''
+
+    def __init__(self, sessions, timeout, data_dir_paths, permanent_UUIDs, on_expire=None, get_metrics=None):
+        self.sessions = sessions
+        self.timeout = timeout
+        self.data_dir_paths = data_dir_paths
+        self.permanent_UUIDs = permanent_UUIDs
+        self.on_expire = on_expire
+        self.get_metrics = get_metrics
+        self.deadlines = []
+        self.pending_dirs = []
+        self.condition = threading.Condition()
+        self.running = False
+        self.last_scan = 0
+        self.last_delete = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.scan()
+        self.running = True
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join()
+
+    def schedule(self, UUID, start):
+        with self.condition:
+            heapq.heappush(self.deadlines, (start + self.timeout, UUID))
+            self.condition.notify()
+
+    def scan(self):
+        deadlines = [(start + self.timeout, UUID) for UUID, start in self.sessions.items() if UUID not in self.permanent_UUIDs]
+        heapq.heapify(deadlines)
+        with self.condition:
+            self.deadlines = deadlines
+            self.last_scan = time.time()
+
+    def pop_expired(self):
+        now = time.time()
+        expired = []
+        with self.condition:
+            while len(self.deadlines) > 0 and self.deadlines[0][0] <= now:
+                expired.append(heapq.heappop(self.deadlines)[1])
+        return expired
+
+    def expire(self, UUID):
+        if UUID in self.permanent_UUIDs:
+            return
+        try:
+            start = self.sessions[UUID]
+        except KeyError:
+            return
+        if start + self.timeout > time.time():
+            # Renewed since it was scheduled
+            self.schedule(UUID=UUID, start=start)
+            return
+        print('Removing UUID: {0}'.format(UUID))
+        try:
+            del(self.sessions[UUID])
+        except KeyError:
+            pass
+        if self.on_expire is not None:
+            self.on_expire(UUID)
+        self.pending_dirs.extend((UUID, os.path.join(data_dir_path, UUID)) for data_dir_path in self.data_dir_paths)
+
+    def log_metrics(self):
+        if self.get_metrics is None:
+            return
+        metrics = self.get_metrics()
+        print("Active sessions: {current} (peak {peak}, limit {limit}), admitted: {admitted}, rejected: {rejected}".format(**metrics))
+
+    def delete_dir(self, UUID, dir_path):
+        if UUID in self.sessions:
+            # Came back since it expired: the folder holds the new uploads
+            print('Keeping the folder of UUID: {0}'.format(UUID))
+            return
+        if os.path.exists(dir_path):
+            shutil.rmtree(dir_path, ignore_errors=True)
+
+    def get_wait_time(self):
+        if len(self.pending_dirs) > 0:
+            return max(self.last_delete + Constant._REAPER_DELETE_INTERVAL - time.time(), 0)
+        wait_time = self.last_scan + Constant._REAPER_RESCAN_INTERVAL - time.time()
+        if len(self.deadlines) > 0:
+            wait_time = min(wait_time, self.deadlines[0][0] - time.time())
+        return max(wait_time, 0)
+
+    def run(self):
+        while True:
+            with self.condition:
+                if not self.running:
+                    return
+                self.condition.wait(timeout=self.get_wait_time())
+                if not self.running:
+                    return
+            try:
+                for UUID in self.pop_expired():
+                    self.expire(UUID=UUID)
+                if len(self.pending_dirs) > 0:
+                    if time.time() - self.last_delete >= Constant._REAPER_DELETE_INTERVAL:
+                        UUID, dir_path = self.pending_dirs.pop(0)
+                        self.delete_dir(UUID=UUID, dir_path=dir_path)
+                        self.last_delete = time.time()
+                elif time.time() - self.last_scan > Constant._REAPER_RESCAN_INTERVAL:
+                    self.scan()
+                    self.log_metrics()
+            except Exception as e:
+                print("Could not expire the UUIDs: {0}".format(e))
@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+
+
+class SessionStore(MutableMapping):
+
+    '''
+    SessionStore class is a dict-like store of the UUIDs (UUID -> start time) backed by SQLite in WAL mode.
+
+    Every assignment is its own transaction: nothing has to be rewritten or flushed, and several server processes
+    can share the same database file. Each thread gets its own connection.
+    '''
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.local = threading.local()
+        with self.get_connection() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS uuids (uuid TEXT PRIMARY KEY, start REAL NOT NULL, permanent INTEGER NOT NULL DEFAULT 0)')
+
+    def get_connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.file_path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self.local.connection = connection
+        return connection
+
+    def __getitem__(self, UUID):
+        row = self.get_connection().execute('SELECT start FROM uuids WHERE uuid = ?', (UUID,)).fetchone()
+        if row is None:
+            raise KeyError(UUID)
+        return row[0]
+
+    def __setitem__(self, UUID, start):
+        self.get_connection().execute('INSERT OR REPLACE INTO uuids (uuid, start, permanent) VALUES (?, ?, COALESCE((SELECT permanent FROM uuids WHERE uuid = ?), 0))', (UUID, start, UUID))
+
+    def __delitem__(self, UUID):
+        if self.get_connection().execute('DELETE FROM uuids WHERE uuid = ?', (UUID,)).rowcount == 0:
+            raise KeyError(UUID)
+
+    def __contains__(self, UUID):
+        return self.get_connection().execute('SELECT 1 FROM uuids WHERE uuid = ?', (UUID,)).fetchone() is not None
+
+    def __iter__(self):
+        return iter([row[0] for row in self.get_connection().execute('SELECT uuid FROM uuids')])
+
+    def __len__(self):
+        return self.get_connection().execute('SELECT COUNT(*) FROM uuids').fetchone()[0]
+
+    def items(self):
+        return self.get_connection().execute('SELECT uuid, start FROM uuids').fetchall()
+
+    def update_many(self, UUIDs, permanent=False):
+        """Insert or update the start time of several UUIDs in one transaction.
+
+        Args:
+            UUIDs (dict): UUID -> start time.
+            permanent (bool): Whether the UUIDs are permanent session IDs.
+
+        """
+        connection = self.get_connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany('INSERT OR REPLACE INTO uuids (uuid, start, permanent) VALUES (?, ?, ?)', [(UUID, start, int(permanent)) for UUID, start in UUIDs.items()])
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+    def get_permanent(self):
+        return set(row[0] for row in self.get_connection().execute('SELECT uuid FROM uuids WHERE permanent = 1'))
+
+    def import_tsv(self, file_path):
+        """Import the UUIDs of a UUID_Timeouts.tsv file (previous storage format), the file is renamed once imported."""
+        with open(file_path, 'r') as fh:
+            UUIDs = {}
+            for line in fh.readlines():
+                ls = line.rstrip('\n').split('\t')
+                if len(ls) == 2:
+                    UUIDs[ls[0]] = float(ls[1])
+        self.update_many(UUIDs=UUIDs)
+        os.replace(file_path, file_path + '.imported')
@@ -0,0 +1,88 @@
+import time
+import threading
+
+
+class SharedActiveSessionTracker():
+
+    '''
+    SharedActiveSessionTracker class is the ActiveSessionTracker of the server workers: the active sessions are kept
+    in the SQLite database of the SessionStore (table active_sessions, indexed by last activity) so that the limit of
+    active sessions holds for all the worker processes together. Each admission is one (immediate) transaction.
+
+    The admission metrics are counted per worker.
+    '''
+
+    def __init__(self, store, timeout, limit):
+        self.store = store
+        self.timeout = timeout
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.peak = 0
+        self.admitted = 0
+        self.rejected = 0
+        connection = self.store.get_connection()
+        connection.execute('CREATE TABLE IF NOT EXISTS active_sessions (uuid TEXT PRIMARY KEY, last_activity REAL NOT NULL)')
+        connection.execute('CREATE INDEX IF NOT EXISTS active_sessions_last_activity ON active_sessions (last_activity)')
+
+    def expire(self, connection):
+        connection.execute('DELETE FROM active_sessions WHERE last_activity <= ?', (time.time() - self.timeout,))
+
+    def count(self, connection):
+        return connection.execute('SELECT COUNT(*) FROM active_sessions').fetchone()[0]
+
+    def admit(self, UUID, active, permanent=False):
+        """Admit the given session if it is already active or if the limit of active sessions is not reached.
+
+        Args:
+            active (bool): Whether the user interacted with the session (resets its timeout).
+            permanent (bool): Whether it is a permanent session ID (never limited).
+
+        Returns:
+            bool: True if the session is admitted, False if the limit of active sessions is reached.
+
+        """
+        connection = self.store.get_connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            self.expire(connection=connection)
+            if connection.execute('SELECT 1 FROM active_sessions WHERE uuid = ?', (UUID,)).fetchone() is not None:
+                if active:
+                    connection.execute('UPDATE active_sessions SET last_activity = ? WHERE uuid = ?', (time.time(), UUID))
+                admitted, new = True, False
+            else:
+                n_sessions = self.count(connection=connection)
+                admitted = permanent or n_sessions < self.limit
+                new = admitted
+                if admitted:
+                    connection.execute('INSERT INTO active_sessions (uuid, last_activity) VALUES (?, ?)', (UUID, time.time()))
+                    with self.lock:
+                        self.peak = max(self.peak, n_sessions + 1)
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        with self.lock:
+            if new:
+                self.admitted += 1
+            elif not admitted:
+                self.rejected += 1
+        return admitted
+
+    def remove(self, UUID):
+        self.store.get_connection().execute('DELETE FROM active_sessions WHERE uuid = ?', (UUID,))
+
+    def __contains__(self, UUID):
+        row = self.store.get_connection().execute('SELECT 1 FROM active_sessions WHERE uuid = ? AND last_activity > ?', (UUID, time.time() - self.timeout)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        return self.store.get_connection().execute('SELECT COUNT(*) FROM active_sessions WHERE last_activity > ?', (time.time() - self.timeout,)).fetchone()[0]
+
+    def get_metrics(self):
+        current = len(self)
+        with self.lock:
+            return {'current': current,
+                    'peak': self.peak,
+                    'limit': self.limit,
+                    'admitted': self.admitted,
+                    'rejected': self.rejected}
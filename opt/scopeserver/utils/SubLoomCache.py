@@ -0,0 +1,59 @@
+import os
+import hashlib
+import threading
+import numpy as np
+
+
+class SubLoomCache():
+
+    '''
+    SubLoomCache class manages the sub looms exported in the tmp folder. Files are content-addressed by the partial
+    md5 hash of the parent loom and the hash of the selected cells: an identical selection is served from the cache.
+    The folder is kept under a size budget by removing the least recently used sub looms.
+    '''
+
+    def __init__(self, dir_path, max_size):
+        self.dir_path = dir_path
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        if not os.path.isdir(dir_path):
+            os.makedirs(dir_path, exist_ok=True)
+
+    @staticmethod
+    def get_key(partial_md5_hash, name, cell_indices):
+        h = hashlib.sha1()
+        h.update(partial_md5_hash.encode('utf-8'))
+        h.update(name.encode('utf-8'))
+        h.update(np.asarray(cell_indices, dtype='<i8').tobytes())
+        return h.hexdigest()
+
+    def get_file_path(self, name, key):
+        return os.path.join(self.dir_path, "{0}.{1}.loom".format(name, key[:16]))
+
+    def get(self, file_path):
+        """Get the size of the cached sub loom located at file_path (and mark it as recently used) or None if missing."""
+        try:
+            os.utime(file_path)
+            return os.path.getsize(file_path)
+        except FileNotFoundError:
+            return None
+
+    def enforce_budget(self, keep=None):
+        with self.lock:
+            files = []
+            for entry in os.scandir(self.dir_path):
+                # Skip the sub looms being written
+                if entry.is_file() and entry.name.endswith('.loom'):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+            total_size = sum(size for _, size, _ in files)
+            for _, size, file_path in sorted(files):
+                if total_size <= self.max_size:
+                    break
+                if file_path == keep:
+                    continue
+                try:
+                    os.remove(file_path)
+                    total_size -= size
+                except OSError as e:
+                    print("Could not remove {0}: {1}".format(file_path, e))
@@ -0,0 +1,195 @@
+import io
+import os
+import h5py
+import threading
+import numpy as np
+import loompy as lp
+
+from scopeserver.utils import Constant
+
+# Same chunking and compression as loompy
+_CHUNK_SIZE = 64
+
+
+class SubLoomWriter():
+
+    '''
+    SubLoomWriter class writes a .loom whose dimensions are known beforehand (e.g.: a subset of the cells of another
+    loom) column batch by column batch: the matrix is preallocated and each batch is written into its column slice.
+    Only full chunks are written (the remaining columns are buffered until the next batch) so that no compressed
+    chunk is written twice.
+
+    The loom is written to a temporary file, moved to its final path (commit) or removed (abort) once complete, or in
+    memory (in_memory, streamed sub looms not kept, up to Constant._SUB_LOOM_MAX_MEMORY_SIZE): no copy on disk. It can
+    be streamed while it is written (get_chunks): HDF5 writes through a TrackedFile, the bytes written since the last
+    call are sent as they are, and the ranges already sent which HDF5 rewrote (e.g.: chunk index and metadata updated
+    on close) are sent again. Nothing is read twice but these ranges.
+    '''
+
+    class TrackedFile():
+
+        '''
+        File object given to h5py (fileobj driver) recording the ranges of the file rewritten after they were sent.
+        '''
+
+        def __init__(self, fh):
+            self.fh = fh
+            # Bytes [0, sent) were sent
+            self.sent = 0
+            self.changed = []
+
+        def seek(self, offset, whence=io.SEEK_SET):
+            return self.fh.seek(offset, whence)
+
+        def tell(self):
+            return self.fh.tell()
+
+        def read(self, size=-1):
+            return self.fh.read(size)
+
+        def write(self, data):
+            start = self.fh.tell()
+            n = self.fh.write(data)
+            if start < self.sent:
+                self.changed.append((start, min(start + n, self.sent)))
+            return n
+
+        def truncate(self, size=None):
+            return self.fh.truncate(size)
+
+        def flush(self):
+            self.fh.flush()
+
+        def get_size(self):
+            position = self.fh.tell()
+            size = self.fh.seek(0, io.SEEK_END)
+            self.fh.seek(position)
+            return size
+
+        def pop_ranges(self):
+            # Ranges to send: the rewritten ones (merged) and the bytes written past the ones sent
+            size = self.get_size()
+            ranges = []
+            for start, end in sorted(self.changed):
+                end = min(end, size)
+                if start >= end:
+                    continue
+                if len(ranges) > 0 and start <= ranges[-1][1]:
+                    ranges[-1] = (ranges[-1][0], max(ranges[-1][1], end))
+                else:
+                    ranges.append((start, end))
+            if size > self.sent:
+                ranges.append((self.sent, size))
+            self.changed = []
+            self.sent = max(self.sent, size)
+            return ranges
+
+    def __init__(self, file_path, n_genes, n_cells, in_memory=False):
+        self.file_path = file_path
+        self.tmp_file_path = None if in_memory else file_path + '.tmp{0}_{1}'.format(os.getpid(), threading.get_ident())
+        self.n_genes = n_genes
+        self.n_cells = n_cells
+        self.offset = 0
+        self.buffer = []
+        self.fh = None
+        self.f = None
+
+    @staticmethod
+    def fits_in_memory(n_genes, n_cells, itemsize=4):
+        # Size of the uncompressed matrix: upper bound of the size of the compressed loom (attributes apart)
+        return n_genes * n_cells * itemsize <= Constant._SUB_LOOM_MAX_MEMORY_SIZE
+
+    def get_progress(self):
+        return (self.offset + sum(vals.shape[1] for vals in self.buffer)) / max(self.n_cells, 1)
+
+    def create(self, dtype):
+        self.fh = SubLoomWriter.TrackedFile(fh=io.BytesIO() if self.tmp_file_path is None else open(self.tmp_file_path, 'w+b'))
+        self.f = h5py.File(self.fh, 'w')
+        self.f.create_group('/layers')
+        self.f.create_group('/row_attrs')
+        self.f.create_group('/col_attrs')
+        # Graph groups of the loompy version in use (created by loompy when connecting in r+ mode)
+        self.f.create_group('/row_edges')
+        self.f.create_group('/col_edges')
+        self.f.create_dataset('/matrix',
+                              shape=(self.n_genes, self.n_cells),
+                              dtype=dtype,
+                              maxshape=(self.n_genes, None),
+                              chunks=(max(min(_CHUNK_SIZE, self.n_genes), 1), max(min(_CHUNK_SIZE, self.n_cells), 1)),
+                              fletcher32=False,
+                              compression="gzip",
+                              shuffle=False,
+                              compression_opts=2)
+
+    def write(self, vals):
+        """Write the next columns of the matrix.
+
+        Args:
+            vals (ndarray): Array of shape (n_genes, n_columns).
+
+        """
+        if self.f is None:
+            self.create(dtype=vals.dtype)
+        self.buffer.append(vals)
+        n_buffered = sum(vals.shape[1] for vals in self.buffer)
+        if self.offset + n_buffered < self.n_cells and n_buffered < _CHUNK_SIZE:
+            return
+        buffered = np.concatenate(self.buffer, axis=1) if len(self.buffer) > 1 else self.buffer[0]
+        n_write = n_buffered if self.offset + n_buffered >= self.n_cells else n_buffered - n_buffered % _CHUNK_SIZE
+        self.f['/matrix'][:, self.offset:self.offset + n_write] = buffered[:, :n_write]
+        self.offset += n_write
+        self.buffer = [buffered[:, n_write:]] if n_write < n_buffered else []
+
+    def close(self, row_attrs, col_attrs, file_attrs):
+        """Write the remaining columns and the attributes (encoded as loompy does) and close the loom.
+
+        Returns:
+            int: The size of the loom (bytes).
+
+        """
+        if self.f is None:
+            self.create(dtype=np.float32)
+        if len(self.buffer) > 0:
+            buffered = np.concatenate(self.buffer, axis=1)
+            self.f['/matrix'][:, self.offset:self.offset + buffered.shape[1]] = buffered
+            self.offset += buffered.shape[1]
+            self.buffer = []
+        if self.offset != self.n_cells:
+            self.abort()
+            raise ValueError("Wrote {0} columns instead of {1}.".format(self.offset, self.n_cells))
+        for key, vals in row_attrs.items():
+            self.f['/row_attrs/' + key] = lp.normalize_attr_values(vals)
+        for key, vals in col_attrs.items():
+            self.f['/col_attrs/' + key] = lp.normalize_attr_values(vals)
+        for key, vals in file_attrs.items():
+            self.f.attrs[key] = lp.normalize_attr_values(vals)
+        self.f.close()
+        return self.fh.get_size()
+
+    def get_chunks(self):
+        """Get the parts of the loom not sent yet: the bytes written since the last call and the ranges already sent
+        which were rewritten since then. The loom is not flushed: the HDF5 metadata cached while the loom is written
+        is sent once, when it is written (on close at the latest).
+
+        Yields:
+            tuple: (offset, bytes) of each part to send (up to _DOWNLOAD_CHUNK_SIZE bytes).
+
+        """
+        if self.fh is None:
+            return
+        for start, end in self.fh.pop_ranges():
+            for offset in range(start, end, Constant._DOWNLOAD_CHUNK_SIZE):
+                self.fh.seek(offset)
+                yield offset, self.fh.read(min(Constant._DOWNLOAD_CHUNK_SIZE, end - offset))
+
+    def commit(self):
+        self.fh.fh.close()
+        os.replace(self.tmp_file_path, self.file_path)
+
+    def abort(self):
+        if self.f is not None and self.f.id.valid:
+            self.f.close()
+        if self.fh is not None:
+            self.fh.fh.close()
+        if self.tmp_file_path is not None and os.path.exists(self.tmp_file_path):
+            os.remove(self.tmp_file_path)
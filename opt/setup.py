@@ -13,8 +13,8 @@ setup(name='scope-server',
       license='GPL-3.0',
       packages=['scopeserver'],
       install_requires=[
-          'grpcio>=1.7.0',
-          'grpcio-tools>=1.7.0',
+          'grpcio>=1.32.0',
+          'grpcio-tools>=1.32.0',
           'loompy==2.0.2',
           'pandas',
           'numpy',
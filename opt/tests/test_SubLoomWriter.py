@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import loompy as lp
+
+from scopeserver.utils import SubLoomWriter as slw
+
+
+def receive(replies, loom_file_size):
+    # Client side: each part is written at its offset (parts can be sent again), the file is truncated to the size of
+    # the last reply
+    data = bytearray()
+    for offset, chunk in replies:
+        if len(data) < offset + len(chunk):
+            data.extend(bytes(offset + len(chunk) - len(data)))
+        data[offset:offset + len(chunk)] = chunk
+    return bytes(data[:loom_file_size])
+
+
+class TestSubLoomWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.dir_path = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.dir_path, 'sub.loom')
+        self.matrix = np.random.RandomState(0).poisson(0.5, size=(300, 5000)).astype(np.float32)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_path)
+
+    def write(self, in_memory):
+        writer = slw.SubLoomWriter(file_path=self.file_path, n_genes=self.matrix.shape[0], n_cells=self.matrix.shape[1], in_memory=in_memory)
+        replies = []
+        for start in range(0, self.matrix.shape[1], 700):
+            writer.write(vals=self.matrix[:, start:start + 700])
+            replies.extend(writer.get_chunks())
+        loom_file_size = writer.close(row_attrs={'Gene': np.array(['G{0}'.format(i) for i in range(self.matrix.shape[0])])},
+                                      col_attrs={'CellID': np.array(['C{0}'.format(i) for i in range(self.matrix.shape[1])])},
+                                      file_attrs={'title': 'sub'})
+        replies.extend(writer.get_chunks())
+        return writer, replies, loom_file_size
+
+    def check(self, data):
+        received_file_path = os.path.join(self.dir_path, 'received.loom')
+        with open(received_file_path, 'wb') as fh:
+            fh.write(data)
+        with lp.connect(received_file_path, mode='r') as ds:
+            np.testing.assert_array_equal(ds[:, :], self.matrix)
+            self.assertEqual(ds.ca.CellID[-1], 'C{0}'.format(self.matrix.shape[1] - 1))
+
+    def test_streamed_file(self):
+        writer, replies, loom_file_size = self.write(in_memory=False)
+        writer.commit()
+        writer.abort()
+        with open(self.file_path, 'rb') as fh:
+            written = fh.read()
+        self.assertEqual(len(written), loom_file_size)
+        self.assertEqual(receive(replies=replies, loom_file_size=loom_file_size), written)
+        # Sent while written: only the ranges rewritten afterwards are sent again
+        self.assertLess(sum(len(chunk) for offset, chunk in replies), 1.5 * loom_file_size)
+        self.check(data=written)
+
+    def test_streamed_in_memory(self):
+        writer, replies, loom_file_size = self.write(in_memory=True)
+        written = writer.fh.fh.getvalue()
+        writer.abort()
+        self.assertEqual(os.listdir(self.dir_path), [])
+        self.assertEqual(receive(replies=replies, loom_file_size=loom_file_size), written)
+        self.check(data=written)
+
+
+if __name__ == '__main__':
+    unittest.main()